@@ -10,20 +10,392 @@ Provides intelligent, context-aware responses.
 By OkayYouGotMe
 """
 
+import asyncio
+import inspect
 import logging
-from anthropic import Anthropic
-from typing import Dict, List, Optional, Tuple
+import re
+from collections import deque
+from functools import lru_cache
+from itertools import islice
+from anthropic import AsyncAnthropic
+from cachetools import TTLCache
+import httpx
+import orjson
+from typing import AsyncIterator, Awaitable, Dict, List, Optional, Tuple, Union
 from datetime import datetime
 
 from config.settings import (
-    CLAUDE_API_KEY, CLAUDE_MODEL, AI_TEMPERATURE,
-    MAX_CONVERSATION_MEMORY, BRUTAL_HONESTY_LEVEL
+    CLAUDE_API_KEY, CLAUDE_MODEL, CLAUDE_MODEL_FAST, AI_TEMPERATURE,
+    MAX_CONVERSATION_MEMORY, BRUTAL_HONESTY_LEVEL, HISTORY_CACHE_BUFFER,
+    HISTORY_CACHE_USERS, HISTORY_CACHE_TTL, USER_PROFILE_TTL, USER_PROFILE_MIN_CHARS
 )
 from database.models import User, MotivationStyle
 from database.operations import get_conversation_history
 
 logger = logging.getLogger(__name__)
 
+# Beta header that enables cache_control blocks on prompts
+PROMPT_CACHING_BETA = "prompt-caching-2024-07-31"
+
+
+# Tool schemas - forcing a tool call makes Claude return a parsed dict
+_INTENT_PROPERTIES = {
+    "intent": {
+        "type": "string",
+        "enum": [
+            "add_task", "complete_task", "add_idea", "view_tasks",
+            "view_ideas", "ask_question", "chat"
+        ]
+    },
+    "confidence": {"type": "integer", "description": "0-100"},
+    "task_name": {"type": "string", "description": "Extracted task name if applicable"},
+    "task_id": {"type": "integer", "description": "Task number if mentioned (like 'task 1')"},
+    "idea": {"type": "string", "description": "Extracted idea if applicable"},
+    "category": {"type": "string", "description": "Auto-detected category"},
+    "question_topic": {"type": "string", "description": "Topic of question if asking something"},
+    "reasoning": {"type": "string", "description": "Brief explanation of why you chose this intent"}
+}
+
+_INTENT_TOOL = {
+    "name": "emit_intent",
+    "description": "Record the detected intent of the user's message.",
+    "input_schema": {
+        "type": "object",
+        "properties": _INTENT_PROPERTIES,
+        "required": ["intent", "confidence", "reasoning"]
+    }
+}
+
+_RESPOND_TOOL = {
+    "name": "respond",
+    "description": "Record the detected intent and your reply to the user.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            **_INTENT_PROPERTIES,
+            "reply": {"type": "string", "description": "Reply for chat/ask_question, else empty"}
+        },
+        "required": ["intent", "confidence", "reasoning", "reply"]
+    }
+}
+
+_BREAKDOWN_TOOL = {
+    "name": "emit_breakdown",
+    "description": "Record how a task should be broken into subtasks.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "should_break_down": {"type": "boolean"},
+            "reasoning": {"type": "string", "description": "Why this should/shouldn't be broken down"},
+            "subtasks": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "name": {"type": "string"},
+                        "estimated_time": {"type": "integer", "description": "Minutes"},
+                        "order": {"type": "integer"}
+                    },
+                    "required": ["name", "estimated_time", "order"]
+                }
+            },
+            "total_estimated_time": {"type": "integer", "description": "Minutes"}
+        },
+        "required": ["should_break_down", "reasoning", "subtasks", "total_estimated_time"]
+    }
+}
+
+_VERDICT_TOOL = {
+    "name": "emit_verdict",
+    "description": "Record whether the user is procrastinating.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "is_procrastinating": {"type": "boolean"},
+            "reasoning": {"type": "string", "description": "Brief explanation"},
+            "redirect_suggestion": {"type": "string", "description": "What they should focus on instead"}
+        },
+        "required": ["is_procrastinating", "reasoning"]
+    }
+}
+
+
+# Intents Claude can pick from, as listed in prompts
+_INTENT_LIST = """- add_task: User wants to add a new task/reminder
+- complete_task: User completed a task
+- add_idea: User wants to save an idea (OTR)
+- view_tasks: User wants to see their tasks
+- view_ideas: User wants to see their ideas
+- ask_question: User has a question (weather, news, how-to, etc.)
+- chat: Just casual conversation
+"""
+
+# Appended to the system prompt for the combined intent + reply call
+_ROUTING_INSTRUCTIONS = f"""
+RESPONSE FORMAT:
+Before replying, classify the user's latest message into one intent:
+{_INTENT_LIST}
+Answer by calling the respond tool. Fill in "reply" with your reply to
+the user if the intent is chat or ask_question; otherwise leave it empty.
+"""
+
+# Standalone intent analysis (see analyze_intent)
+_INTENT_PROMPT_TEMPLATE = """Analyze this message and determine the user's intent.
+
+User message: "{user_message}"
+
+Possible intents:
+""" + _INTENT_LIST + """
+Record your answer with the emit_intent tool.
+"""
+
+
+# Idea categories, each with the words that point to it. Most ideas
+# mention at least one of these, so they can be labelled locally
+# without an API round-trip.
+_CATEGORY_KEYWORDS = {
+    "Business": frozenset({
+        "business", "startup", "company", "customer", "customers", "client",
+        "clients", "product", "market", "marketing", "sell", "sales", "brand",
+        "shop", "store", "side", "hustle", "revenue", "launch", "app"
+    }),
+    "Personal": frozenset({
+        "family", "friend", "friends", "home", "house", "kids", "wife",
+        "husband", "partner", "birthday", "gift", "trip", "vacation",
+        "travel", "wedding", "relationship", "declutter", "room"
+    }),
+    "Creative": frozenset({
+        "write", "writing", "book", "story", "novel", "poem", "song", "music",
+        "paint", "painting", "draw", "drawing", "art", "design", "photo",
+        "photography", "video", "film", "podcast", "blog", "craft"
+    }),
+    "Technology": frozenset({
+        "code", "coding", "software", "website", "automate", "automation",
+        "script", "bot", "api", "ai", "computer", "server", "database",
+        "program", "programming", "tech", "python", "tool", "plugin"
+    }),
+    "Health/Fitness": frozenset({
+        "health", "healthy", "fitness", "gym", "workout", "exercise", "run",
+        "running", "diet", "eat", "eating", "meal", "sleep", "weight",
+        "yoga", "meditate", "meditation", "doctor", "walk", "steps"
+    }),
+    "Learning": frozenset({
+        "learn", "learning", "study", "course", "class", "read", "reading",
+        "language", "spanish", "french", "tutorial", "skill", "skills",
+        "practice", "research", "lecture", "certification", "exam"
+    }),
+    "Finance": frozenset({
+        "money", "save", "saving", "savings", "budget", "invest", "investing",
+        "investment", "stock", "stocks", "crypto", "debt", "loan", "tax",
+        "taxes", "retirement", "income", "expenses", "bank", "pay"
+    }),
+    "Career": frozenset({
+        "career", "job", "promotion", "promoted", "resume", "cv", "interview",
+        "boss", "manager", "raise", "salary", "linkedin", "network",
+        "networking", "mentor", "hire", "hiring", "role", "position"
+    }),
+}
+
+_WORD_RE = re.compile(r"[a-z]+")
+
+
+def _categorize_idea_locally(idea_text: str) -> Optional[str]:
+    """
+    Pick the category whose keywords the idea mentions most.
+    
+    Args:
+        idea_text: The idea to categorize
+    
+    Returns:
+        Category name, or None if no keyword matched (or it's a tie)
+    """
+    words = set(_WORD_RE.findall(idea_text.lower()))
+    
+    scores = sorted(
+        ((len(words & keywords), category) for category, keywords in _CATEGORY_KEYWORDS.items()),
+        reverse=True
+    )
+    
+    best_score, best_category = scores[0]
+    
+    # Nothing matched, or two categories are equally likely - let Claude decide
+    if best_score == 0 or best_score == scores[1][0]:
+        return None
+    
+    return best_category
+
+
+# Clear-cut signals for detect_procrastination; anything in between goes to Claude
+_PROCRASTINATION_RE = re.compile(
+    r"\b(netflix|youtube|tiktok|reddit|instagram|twitter|facebook|"
+    r"sports|celebrity|celebrities|gossip|memes?|movies?|video games?)\b",
+    re.IGNORECASE
+)
+_WORK_RE = re.compile(
+    r"\b(deadline|task|tasks|report|meeting|code|email|project|presentation|client)\b",
+    re.IGNORECASE
+)
+
+
+# Claude fallback for ideas the keywords can't place
+_CATEGORIZE_PROMPT_TEMPLATE = """Categorize this idea into ONE category:
+
+Idea: "{idea_text}"
+
+User profession: {profession}
+
+Available categories:
+""" + "".join(f"- {category}\n" for category in [*_CATEGORY_KEYWORDS, "Other"]) + """
+Respond with ONLY the category name, nothing else.
+"""
+
+
+# COMMUNICATION STYLE section of the system prompt, per motivation style
+_STYLE_FRAGMENTS: Dict[str, str] = {
+    "gentle": """- Use soft, encouraging language
+- Gentle nudges, not harsh criticism
+- Focus on progress, not perfection
+- Be patient and understanding
+""",
+    
+    "direct": """- Be brutally honest - no sugarcoating
+- Call out procrastination and excuses
+- Direct, straightforward feedback
+- Challenge them to do better
+""",
+    
+    "celebrate": """- Celebrate every win, big or small
+- High energy, enthusiastic tone
+- Focus on achievements
+- Build momentum with positivity
+""",
+    
+    "factual": """- Just the facts, no fluff
+- Concise, clear communication
+- Data-driven feedback
+- Minimal emotional language
+"""
+}
+
+
+@lru_cache(maxsize=1024)
+def _build_system_prompt_cached(
+    name: Optional[str],
+    profession: Optional[str],
+    work_schedule: Optional[str],
+    goals: Tuple[str, ...],
+    motivation_style: str,
+    brutal_honesty: str,
+    profile: Optional[str] = None
+) -> str:
+    """
+    Build the system prompt from plain profile fields.
+    
+    Memoized on those fields, so a profile change simply produces a
+    new cache key. Sending the exact same bytes every turn is also
+    what lets Anthropic serve the system prompt from its prompt cache.
+    
+    When a compact profile summary is given, it replaces the raw
+    profession / schedule / goals section.
+    
+    Returns:
+        System prompt string
+    """
+    # Base identity
+    parts = [f"""You are an AI Task Assistant helping {name or 'a user'}.
+
+Your purpose is to help them stay productive through:
+- Natural conversation (no robotic commands)
+- Smart task management
+- Honest feedback
+- Goal accountability
+
+"""]
+    
+    # Add user context
+    if profile:
+        parts.append(f"USER CONTEXT:\n{profile}\n")
+    
+    else:
+        if profession:
+            parts.append(f"USER CONTEXT:\n- Profession: {profession}\n")
+        
+        if work_schedule:
+            parts.append(f"- Schedule: {work_schedule}\n")
+        
+        if goals:
+            goals_text = "\n  ".join([f"• {goal}" for goal in goals])
+            parts.append(f"- Goals:\n  {goals_text}\n")
+    
+    parts.append("\n")
+    
+    # Add motivation style
+    parts.append("COMMUNICATION STYLE:\n")
+    parts.append(_STYLE_FRAGMENTS.get(motivation_style, _STYLE_FRAGMENTS["factual"]))
+    
+    # Add behavioral guidelines
+    parts.append(f"""
+GUIDELINES:
+1. Understand context - remember what you talked about before
+2. Detect intent - figure out what they want (add task, complete, chat, etc.)
+3. Be proactive - offer to help before they ask
+4. Break down overwhelm - simplify big tasks
+5. Redirect distractions - guide back to goals when off-track
+6. Stay natural - talk like a human, not a robot
+
+BRUTAL HONESTY LEVEL: {brutal_honesty}
+- If "high": Be very direct about failures and patterns
+- If "medium": Balanced honesty with encouragement  
+- If "low": Gentle feedback, focus on positives
+
+Remember: You're helping them WIN at life, not just manage tasks.
+""")
+    
+    return "".join(parts)
+
+
+async def _resolve(value):
+    """
+    Await a value if it's still pending, otherwise return it as-is.
+    
+    Lets callers hand over context that is still being loaded, so the
+    load overlaps with the rest of the request setup.
+    """
+    return await value if inspect.isawaitable(value) else value
+
+
+def _motivation_style(user: User) -> str:
+    """
+    Get the user's motivation style as a plain string.
+    
+    Args:
+        user: User object
+    
+    Returns:
+        Style value (defaults to "direct" when unset)
+    """
+    return user.motivation_style or "direct"
+
+
+class _UserHistory:
+    """
+    In-memory conversation history for one user.
+    
+    Turns are numbered from when the history was loaded: `total` is how
+    many have been added, and `anchor` is the number of the first turn
+    in the current prompt window.
+    """
+    
+    def __init__(self, turns):
+        self.turns = deque(turns, maxlen=MAX_CONVERSATION_MEMORY)
+        self.total = len(self.turns)
+        self.anchor: Optional[int] = None
+        
+        # Turns before `summarized` are folded into `summary`
+        self.summary = ""
+        self.summarized = 0
+        self.summary_task: Optional[asyncio.Task] = None
+
 
 class ClaudeEngine:
     """
@@ -36,14 +408,39 @@ class ClaudeEngine:
     - Personalized responses
     """
     
+    # One global instance - no per-instance __dict__ needed
+    __slots__ = (
+        "_http", "client", "model", "fast_model",
+        "_history_cache", "_profiles", "_profile_refreshes"
+    )
+    
     def __init__(self):
         """Initialize Claude AI client"""
-        self.client = Anthropic(api_key=CLAUDE_API_KEY)
+        # One pooled HTTP/2 connection set shared by every Claude call
+        self._http = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+            timeout=httpx.Timeout(30.0, connect=5.0)
+        )
+        self.client = AsyncAnthropic(api_key=CLAUDE_API_KEY, http_client=self._http)
         self.model = CLAUDE_MODEL
+        self.fast_model = CLAUDE_MODEL_FAST  # For simple classification calls
+        
+        # Recent turns per active user (see _UserHistory)
+        self._history_cache: TTLCache = TTLCache(
+            maxsize=HISTORY_CACHE_USERS, ttl=HISTORY_CACHE_TTL
+        )
+        
+        # Compact profile summaries: user_id -> (profile fields, summary)
+        self._profiles: TTLCache = TTLCache(
+            maxsize=HISTORY_CACHE_USERS, ttl=USER_PROFILE_TTL
+        )
+        self._profile_refreshes: Dict[int, asyncio.Task] = {}
+        
         logger.info("🧠 Claude AI Engine initialized")
     
     
-    def _build_system_prompt(self, user: User) -> str:
+    def _build_system_prompt(self, user: User, profile: Optional[str] = None) -> str:
         """
         Build personalized system prompt based on user profile.
         
@@ -52,115 +449,359 @@ class ClaudeEngine:
         
         Args:
             user: User object with profile info
+            profile: Compact profile summary from _get_profile (optional)
         
         Returns:
             System prompt string
         """
-        # Base identity
-        prompt = f"""You are an AI Task Assistant helping {user.name or 'a user'}.
-
-Your purpose is to help them stay productive through:
-- Natural conversation (no robotic commands)
-- Smart task management
-- Honest feedback
-- Goal accountability
-
-"""
-        
-        # Add user context
-        if user.profession:
-            prompt += f"USER CONTEXT:\n- Profession: {user.profession}\n"
-        
-        if user.work_schedule:
-            prompt += f"- Schedule: {user.work_schedule}\n"
+        return _build_system_prompt_cached(
+            user.name,
+            user.profession,
+            user.work_schedule,
+            tuple(user.goals or ()),
+            _motivation_style(user),
+            BRUTAL_HONESTY_LEVEL,
+            profile
+        )
+    
+    
+    def _get_profile(self, user: User) -> Optional[str]:
+        """
+        Get the compact profile summary for a user, if there is one.
         
-        if user.goals:
-            goals_text = "\n  ".join([f"• {goal}" for goal in user.goals])
-            prompt += f"- Goals:\n  {goals_text}\n"
+        Only long profiles are summarized - short ones are cheaper to
+        send as-is. A missing or outdated summary is rebuilt in the
+        background, and the raw profile is used until it's ready.
         
-        prompt += "\n"
+        Must be called from the event loop.
         
-        # Add motivation style
-        motivation_style = user.motivation_style.value if user.motivation_style else "direct"
+        Args:
+            user: User object with profile info
         
-        prompt += f"COMMUNICATION STYLE:\n"
+        Returns:
+            Profile summary, or None to use the raw profile fields
+        """
+        user_id = user.id
+        goals = tuple(user.goals or ())
+        fields = (user.profession, user.work_schedule, goals)
         
-        if motivation_style == "gentle":
-            prompt += """- Use soft, encouraging language
-- Gentle nudges, not harsh criticism
-- Focus on progress, not perfection
-- Be patient and understanding
-"""
+        size = len(user.profession or "") + len(user.work_schedule or "") + sum(map(len, goals))
+        if size < USER_PROFILE_MIN_CHARS:
+            return None
         
-        elif motivation_style == "direct":
-            prompt += """- Be brutally honest - no sugarcoating
-- Call out procrastination and excuses
-- Direct, straightforward feedback
-- Challenge them to do better
-"""
+        cached = self._profiles.get(user_id)
+        if cached and cached[0] == fields:
+            return cached[1]
         
-        elif motivation_style == "celebrate":
-            prompt += """- Celebrate every win, big or small
-- High energy, enthusiastic tone
-- Focus on achievements
-- Build momentum with positivity
-"""
+        # Rebuild in the background - don't make this message wait
+        if user_id not in self._profile_refreshes:
+            task = asyncio.create_task(self._refresh_profile(user_id, fields))
+            self._profile_refreshes[user_id] = task
+            task.add_done_callback(lambda _: self._profile_refreshes.pop(user_id, None))
         
-        else:  # factual
-            prompt += """- Just the facts, no fluff
-- Concise, clear communication
-- Data-driven feedback
-- Minimal emotional language
-"""
+        return None
+    
+    
+    async def _refresh_profile(self, user_id: int, fields: Tuple):
+        """
+        Summarize a user's profile into a compact block for the system prompt.
         
-        # Add behavioral guidelines
-        prompt += f"""
-GUIDELINES:
-1. Understand context - remember what you talked about before
-2. Detect intent - figure out what they want (add task, complete, chat, etc.)
-3. Be proactive - offer to help before they ask
-4. Break down overwhelm - simplify big tasks
-5. Redirect distractions - guide back to goals when off-track
-6. Stay natural - talk like a human, not a robot
+        Args:
+            user_id: User's database ID
+            fields: (profession, work_schedule, goals) to summarize
+        """
+        try:
+            profession, work_schedule, goals = fields
+            goals_text = "\n".join(f"- {goal}" for goal in goals)
+            
+            # Patterns from older conversations, if we have them
+            history = self._history_cache.get(user_id)
+            patterns = history.summary if history and history.summary else "(none)"
+            
+            prompt = f"""Write a compact profile of this user for their task assistant, in under 300 tokens.
+Use short bullet points. Keep what helps with daily planning and motivation;
+merge overlapping goals and drop filler.
 
-BRUTAL HONESTY LEVEL: {BRUTAL_HONESTY_LEVEL}
-- If "high": Be very direct about failures and patterns
-- If "medium": Balanced honesty with encouragement  
-- If "low": Gentle feedback, focus on positives
+Profession: {profession or "Not specified"}
+Schedule: {work_schedule or "Not specified"}
+Goals:
+{goals_text or "(none)"}
 
-Remember: You're helping them WIN at life, not just manage tasks.
-"""
-        
-        return prompt
+Recent conversation patterns:
+{patterns}
+
+Respond with ONLY the profile."""
+            
+            response = await self.client.messages.create(
+                model=self.fast_model,
+                max_tokens=400,
+                temperature=0.3,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            
+            self._profiles[user_id] = (fields, response.content[0].text.strip())
+            
+            logger.info(f"🪪 Profile summary refreshed for user {user_id}")
+            
+        except Exception as e:
+            logger.error(f"❌ Error refreshing profile summary: {e}")
     
     
-    def _format_conversation_history(
+    async def _format_conversation_history(
         self,
         user_id: int,
-        limit: int = 5
+        limit: int = 5,
+        buffer: int = HISTORY_CACHE_BUFFER
     ) -> List[Dict[str, str]]:
         """
         Get formatted conversation history for context.
         
+        History comes from the in-memory cache; the database is only
+        read the first time a user shows up (or after they went idle).
+        
+        The window starts at a fixed turn and only grows at the end, so
+        the prompt prefix (and Claude's prompt cache) survives from turn
+        to turn. Once it holds more than limit + buffer turns, it is cut
+        back to the latest `limit` turns. The turns that were dropped are
+        folded into a short summary, which leads the history. The summary
+        is written in the background; until it lands, the previous one is
+        used so the reply doesn't wait on an extra Claude call.
+        
         Args:
             user_id: User's database ID
-            limit: Number of recent messages to include
+            limit: Number of recent messages to keep after a cut
+            buffer: Extra messages the window may grow by before a cut
         
         Returns:
             List of message dicts for Claude API
         """
-        history = get_conversation_history(user_id, limit=limit)
+        keep = limit + buffer
+        
+        state = self._history_cache.get(user_id)
+        if state is None:
+            # Sync DB call - keep it off the event loop
+            history = await asyncio.to_thread(get_conversation_history, user_id, keep + 1)
+            state = _UserHistory(
+                (conv.user_message, conv.ai_response) for conv in reversed(history)
+            )
+            self._history_cache[user_id] = state
+        
+        first = state.total - len(state.turns)  # Number of turns[0]
+        
+        if state.anchor is None or state.anchor < first or state.total - state.anchor > keep:
+            # Window is new, or it outgrew the buffer - cut it back
+            cut = max(state.total - limit, first)
+            
+            if state.anchor is None:
+                state.summarized = cut
+            else:
+                evicted = list(state.turns)[max(state.summarized, first) - first:cut - first]
+                if evicted:
+                    self._start_summary(state, evicted, cut)
+            
+            state.anchor = cut
         
         # Convert to Claude message format (newest last)
-        messages = []
-        for conv in reversed(history):
-            messages.append({"role": "user", "content": conv.user_message})
-            messages.append({"role": "assistant", "content": conv.ai_response})
+        messages = [
+            message
+            for user_message, ai_response in islice(state.turns, state.anchor - first, None)
+            for message in (
+                {"role": "user", "content": user_message},
+                {"role": "assistant", "content": ai_response}
+            )
+        ]
+        
+        # Earlier turns ride along as a summary on the first message
+        if state.summary and messages:
+            messages[0]["content"] = (
+                f"<summary>\n{state.summary}\n</summary>\n\n{messages[0]['content']}"
+            )
+        
+        return messages
+    
+    
+    def remember_turn(self, user_id: int, user_message: str, ai_response: str):
+        """
+        Add a finished exchange to the in-memory history.
+        
+        Call this alongside save_conversation so the cache matches the
+        database. Users who aren't cached are skipped; their history is
+        loaded from the database on the next message.
+        
+        Args:
+            user_id: User's database ID
+            user_message: What the user said
+            ai_response: What we replied
+        """
+        state = self._history_cache.get(user_id)
+        if state is not None:
+            state.turns.append((user_message, ai_response))
+            state.total += 1
+    
+    
+    def _start_summary(self, state: _UserHistory, turns: List[Tuple[str, str]], cut: int):
+        """
+        Fold evicted turns into the history summary in the background.
+        
+        A summary still being written for an earlier cut is cancelled;
+        its turns are part of `turns` since they were never summarized.
+        
+        Args:
+            state: The user's history
+            turns: Turns from state.summarized up to the cut (oldest first)
+            cut: Number of the first turn in the new window
+        """
+        if state.summary_task is not None:
+            state.summary_task.cancel()
+        
+        state.summary_task = asyncio.create_task(self._refresh_summary(state, turns, cut))
+    
+    
+    async def _refresh_summary(self, state: _UserHistory, turns: List[Tuple[str, str]], cut: int):
+        """
+        Write a new history summary and store it if it's still current.
+        
+        Args:
+            state: The user's history
+            turns: Turns to fold into the summary (oldest first)
+            cut: Number of the first turn in the window this summary is for
+        """
+        summary = await self._summarize_history(turns, state.summary)
+        
+        # The window moved again while we waited - a newer summary covers it
+        if state.anchor != cut:
+            return
+        
+        state.summary = summary
+        state.summarized = cut
+        state.summary_task = None
+    
+    
+    async def _summarize_history(
+        self,
+        turns: List[Tuple[str, str]],
+        previous_summary: str = ""
+    ) -> str:
+        """
+        Compress older conversation turns into a short summary.
+        
+        Args:
+            turns: (user message, AI response) pairs being dropped (oldest first)
+            previous_summary: Summary of turns dropped before these
+        
+        Returns:
+            Summary text (previous summary if the call fails)
+        """
+        try:
+            transcript = "\n".join(
+                f"User: {user_message}\nAssistant: {ai_response}"
+                for user_message, ai_response in turns
+            )
+            
+            prompt = f"""Summarize this conversation between a user and their task assistant in under 200 tokens.
+Keep facts that matter later: commitments, deadlines, preferences, and anything unresolved.
+
+Earlier summary:
+{previous_summary or "(none)"}
+
+Conversation:
+{transcript}
+
+Respond with ONLY the summary."""
+            
+            response = await self.client.messages.create(
+                model=self.fast_model,
+                max_tokens=300,
+                temperature=0.3,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            
+            summary = response.content[0].text.strip()
+            
+            logger.info(f"🗜️ Summarized {len(turns)} old conversations")
+            return summary
+            
+        except Exception as e:
+            logger.error(f"❌ Error summarizing history: {e}")
+            return previous_summary
+    
+    
+    def _tool_input(self, response) -> Dict:
+        """
+        Pull the structured result out of a forced tool call.
+        
+        Args:
+            response: Claude API response
+        
+        Returns:
+            The tool input as a dict
+        """
+        for block in response.content:
+            if block.type == "tool_use":
+                return block.input
+        
+        # Shouldn't happen with tool_choice set, but don't lose the answer
+        return orjson.loads(response.content[0].text.encode())
+    
+    
+    def _build_messages(
+        self,
+        history: List[Dict],
+        user_message: str,
+        context: Dict = None
+    ) -> List[Dict]:
+        """
+        Assemble the message list sent to Claude.
+        
+        The system prompt and history form a stable prefix, so a cache
+        breakpoint goes on the last history message. Anything that
+        changes every turn (pending tasks, completion rate) goes in the
+        final user message, after the cached part.
+        
+        Args:
+            history: Formatted conversation history (oldest first)
+            user_message: What the user just said
+            context: Additional context (tasks, stats, etc.)
+        
+        Returns:
+            List of message dicts for Claude API
+        """
+        messages = list(history)
+        
+        if messages:
+            last = messages[-1]
+            messages[-1] = {
+                "role": last["role"],
+                "content": [{
+                    "type": "text",
+                    "text": last["content"],
+                    "cache_control": {"type": "ephemeral"}
+                }]
+            }
+        
+        content = []
+        
+        if context:
+            context_str = "CURRENT CONTEXT:\n"
+            
+            if "pending_tasks" in context:
+                context_str += f"- Pending tasks: {context['pending_tasks']}\n"
+            
+            if "completion_rate" in context:
+                context_str += f"- Completion rate: {context['completion_rate']}%\n"
+            
+            if "recent_pattern" in context:
+                context_str += f"- Recent pattern: {context['recent_pattern']}\n"
+            
+            content.append({"type": "text", "text": f"<context>\n{context_str}</context>"})
+        
+        content.append({"type": "text", "text": user_message})
+        messages.append({"role": "user", "content": content})
         
         return messages
     
     
-    def analyze_intent(
+    async def analyze_intent(
         self,
         user_message: str,
         user: User,
@@ -187,52 +828,20 @@ Remember: You're helping them WIN at life, not just manage tasks.
         """
         try:
             # Build analysis prompt
-            analysis_prompt = f"""Analyze this message and determine the user's intent.
-
-User message: "{user_message}"
-
-Possible intents:
-- add_task: User wants to add a new task/reminder
-- complete_task: User completed a task
-- add_idea: User wants to save an idea (OTR)
-- view_tasks: User wants to see their tasks
-- view_ideas: User wants to see their ideas
-- ask_question: User has a question (weather, news, how-to, etc.)
-- chat: Just casual conversation
-
-Respond ONLY with valid JSON (no markdown, no explanation):
-{{
-  "intent": "the_detected_intent",
-  "confidence": 85,
-  "task_name": "extracted task name if applicable",
-  "task_id": "task number if mentioned (like 'task 1')",
-  "idea": "extracted idea if applicable",
-  "category": "auto-detected category",
-  "question_topic": "topic of question if asking something",
-  "reasoning": "brief explanation of why you chose this intent"
-}}
-"""
+            analysis_prompt = _INTENT_PROMPT_TEMPLATE.format(user_message=user_message)
             
             # Call Claude
-            response = self.client.messages.create(
-                model=self.model,
+            create = self.client.messages.create
+            response = await create(
+                model=self.fast_model,
                 max_tokens=500,
                 temperature=0.3,  # Lower temperature for analysis
-                messages=[{"role": "user", "content": analysis_prompt}]
+                messages=[{"role": "user", "content": analysis_prompt}],
+                tools=[_INTENT_TOOL],
+                tool_choice={"type": "tool", "name": _INTENT_TOOL["name"]}
             )
             
-            # Parse response
-            import json
-            result_text = response.content[0].text.strip()
-            
-            # Remove markdown code blocks if present
-            if result_text.startswith("```"):
-                result_text = result_text.split("```")[1]
-                if result_text.startswith("json"):
-                    result_text = result_text[4:]
-                result_text = result_text.strip()
-            
-            result = json.loads(result_text)
+            result = self._tool_input(response)
             
             logger.info(f"💡 Intent detected: {result.get('intent')} (confidence: {result.get('confidence')}%)")
             return result
@@ -247,70 +856,181 @@ Respond ONLY with valid JSON (no markdown, no explanation):
             }
     
     
-    def generate_response(
+    async def _response_request(
         self,
         user_message: str,
         user: User,
-        context: Dict = None
+        context: Union[Dict, Awaitable[Dict]] = None
+    ) -> Dict:
+        """
+        Build the request arguments for a conversational response.
+        
+        Args:
+            user_message: What the user said
+            user: User object with profile
+            context: Additional context (tasks, stats, etc.), or an
+                awaitable still loading it
+        
+        Returns:
+            Keyword arguments for messages.create / messages.stream
+        """
+        # The system prompt is static per user (so it stays cacheable) and
+        # memoized, so build it inline; only history and context wait on I/O
+        system_prompt = self._build_system_prompt(user, self._get_profile(user))
+        history, context = await asyncio.gather(
+            self._format_conversation_history(user.id, limit=5),
+            _resolve(context)
+        )
+        
+        # Volatile context rides along with the new message
+        current_messages = self._build_messages(history, user_message, context)
+        
+        return {
+            "model": self.model,
+            "max_tokens": 1000,
+            "temperature": AI_TEMPERATURE,
+            "system": [{
+                "type": "text",
+                "text": system_prompt,
+                "cache_control": {"type": "ephemeral"}
+            }],
+            "messages": current_messages,
+            "extra_headers": {"anthropic-beta": PROMPT_CACHING_BETA}
+        }
+    
+    
+    async def stream_response(
+        self,
+        user_message: str,
+        user: User,
+        context: Union[Dict, Awaitable[Dict]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a natural, context-aware response as it is generated.
+        
+        Yields text chunks as soon as Claude produces them, so the bot
+        can show the first words instead of waiting for the full reply.
+        
+        Args:
+            user_message: What the user said
+            user: User object with profile
+            context: Additional context (tasks, stats, etc.), or an
+                awaitable still loading it
+        
+        Yields:
+            Chunks of the AI-generated response
+        """
+        produced = 0
+        
+        try:
+            request = await self._response_request(user_message, user, context)
+            
+            # Call Claude (streaming)
+            async with self.client.messages.stream(**request) as stream:
+                async for text in stream.text_stream:
+                    produced += len(text)
+                    yield text
+            
+            logger.info(f"💬 Streamed response ({produced} chars)")
+            
+        except Exception as e:
+            logger.error(f"❌ Error generating response: {e}")
+            if not produced:
+                yield "Sorry, I encountered an error. Can you try that again?"
+    
+    
+    async def generate_response(
+        self,
+        user_message: str,
+        user: User,
+        context: Union[Dict, Awaitable[Dict]] = None
     ) -> str:
         """
         Generate a natural, context-aware response.
         
+        Collects the streamed chunks into a single string for callers
+        that need the whole reply at once.
+        
         Args:
             user_message: What the user said
             user: User object with profile
-            context: Additional context (tasks, stats, etc.)
+            context: Additional context (tasks, stats, etc.), or an
+                awaitable still loading it
         
         Returns:
             AI-generated response string
         """
+        chunks = [chunk async for chunk in self.stream_response(user_message, user, context)]
+        return "".join(chunks).strip()
+    
+    
+    async def analyze_and_respond(
+        self,
+        user_message: str,
+        user: User,
+        context: Union[Dict, Awaitable[Dict]] = None
+    ) -> Dict:
+        """
+        Detect intent and draft a reply in a single Claude call.
+        
+        Chat and questions are the bulk of traffic, and they need both
+        an intent and a reply. Asking for both at once saves a full
+        round trip. Intents that get routed to a handler (add_task,
+        complete_task, ...) come back with an empty reply.
+        
+        Args:
+            user_message: What the user said
+            user: User object with profile
+            context: Additional context (tasks, stats, etc.), or an
+                awaitable still loading it
+        
+        Returns:
+            Dict with intent, confidence, extracted data and reply
+        """
         try:
-            # Build system prompt
-            system_prompt = self._build_system_prompt(user)
-            
-            # Get conversation history
-            history = self._format_conversation_history(user.id, limit=5)
-            
-            # Add current message
-            current_messages = history + [{"role": "user", "content": user_message}]
-            
-            # Add context if provided
-            if context:
-                context_str = "\n\nCURRENT CONTEXT:\n"
-                
-                if "pending_tasks" in context:
-                    context_str += f"- Pending tasks: {context['pending_tasks']}\n"
-                
-                if "completion_rate" in context:
-                    context_str += f"- Completion rate: {context['completion_rate']}%\n"
-                
-                if "recent_pattern" in context:
-                    context_str += f"- Recent pattern: {context['recent_pattern']}\n"
-                
-                # Add context to system prompt
-                system_prompt += context_str
+            system_prompt = self._build_system_prompt(user, self._get_profile(user))
+            history, context = await asyncio.gather(
+                self._format_conversation_history(user.id, limit=5),
+                _resolve(context)
+            )
+            current_messages = self._build_messages(history, user_message, context)
             
-            # Call Claude
-            response = self.client.messages.create(
+            create = self.client.messages.create
+            response = await create(
                 model=self.model,
                 max_tokens=1000,
                 temperature=AI_TEMPERATURE,
-                system=system_prompt,
-                messages=current_messages
+                system=[
+                    {"type": "text", "text": system_prompt},
+                    {
+                        "type": "text",
+                        "text": _ROUTING_INSTRUCTIONS,
+                        "cache_control": {"type": "ephemeral"}
+                    }
+                ],
+                messages=current_messages,
+                extra_headers={"anthropic-beta": PROMPT_CACHING_BETA},
+                tools=[_RESPOND_TOOL],
+                tool_choice={"type": "tool", "name": _RESPOND_TOOL["name"]}
             )
             
-            # Extract response text
-            response_text = response.content[0].text.strip()
+            result = self._tool_input(response)
             
-            logger.info(f"💬 Generated response ({len(response_text)} chars)")
-            return response_text
+            logger.info(f"💡 Intent detected: {result.get('intent')} (confidence: {result.get('confidence')}%)")
+            return result
             
         except Exception as e:
-            logger.error(f"❌ Error generating response: {e}")
-            return "Sorry, I encountered an error. Can you try that again?"
+            logger.error(f"❌ Error analyzing message: {e}")
+            # Default to chat; caller falls back to generate_response
+            return {
+                "intent": "chat",
+                "confidence": 50,
+                "reasoning": "Failed to analyze, defaulting to chat",
+                "reply": ""
+            }
     
     
-    def break_down_task(
+    async def break_down_task(
         self,
         task_name: str,
         user: User,
@@ -327,6 +1047,8 @@ Respond ONLY with valid JSON (no markdown, no explanation):
         Returns:
             Dict with breakdown info (subtasks, total_time, etc.)
         """
+        style = _motivation_style(user)
+        
         try:
             prompt = f"""Break down this task into manageable subtasks.
 
@@ -335,7 +1057,7 @@ Task: "{task_name}"
 
 User context:
 - Profession: {user.profession or 'Not specified'}
-- Working style: {user.motivation_style.value if user.motivation_style else 'Unknown'}
+- Working style: {style}
 
 Create 3-5 subtasks that:
 1. Are specific and actionable
@@ -343,37 +1065,19 @@ Create 3-5 subtasks that:
 3. Follow a logical order
 4. Are each under 60 minutes
 
-Respond ONLY with valid JSON:
-{{
-  "should_break_down": true/false,
-  "reasoning": "why this should/shouldn't be broken down",
-  "subtasks": [
-    {{"name": "Subtask 1", "estimated_time": 30, "order": 1}},
-    {{"name": "Subtask 2", "estimated_time": 45, "order": 2}}
-  ],
-  "total_estimated_time": 75
-}}
+Record your answer with the emit_breakdown tool.
 """
             
-            response = self.client.messages.create(
+            response = await self.client.messages.create(
                 model=self.model,
                 max_tokens=800,
                 temperature=0.5,
-                messages=[{"role": "user", "content": prompt}]
+                messages=[{"role": "user", "content": prompt}],
+                tools=[_BREAKDOWN_TOOL],
+                tool_choice={"type": "tool", "name": _BREAKDOWN_TOOL["name"]}
             )
             
-            # Parse response
-            import json
-            result_text = response.content[0].text.strip()
-            
-            # Clean markdown if present
-            if result_text.startswith("```"):
-                result_text = result_text.split("```")[1]
-                if result_text.startswith("json"):
-                    result_text = result_text[4:]
-                result_text = result_text.strip()
-            
-            result = json.loads(result_text)
+            result = self._tool_input(response)
             
             logger.info(f"📋 Task breakdown: {len(result.get('subtasks', []))} subtasks")
             return result
@@ -388,7 +1092,7 @@ Respond ONLY with valid JSON:
             }
     
     
-    def categorize_idea(self, idea_text: str, user: User) -> str:
+    async def categorize_idea(self, idea_text: str, user: User) -> str:
         """
         Auto-categorize an idea.
         
@@ -399,29 +1103,20 @@ Respond ONLY with valid JSON:
         Returns:
             Category string
         """
+        # Cheap path: keyword match, no API call
+        category = _categorize_idea_locally(idea_text)
+        if category:
+            logger.info(f"🏷️ Idea categorized locally as: {category}")
+            return category
+        
         try:
-            prompt = f"""Categorize this idea into ONE category:
-
-Idea: "{idea_text}"
-
-User profession: {user.profession or 'Not specified'}
-
-Available categories:
-- Business
-- Personal
-- Creative
-- Technology
-- Health/Fitness
-- Learning
-- Finance
-- Career
-- Other
-
-Respond with ONLY the category name, nothing else.
-"""
+            prompt = _CATEGORIZE_PROMPT_TEMPLATE.format(
+                idea_text=idea_text,
+                profession=user.profession or 'Not specified'
+            )
             
-            response = self.client.messages.create(
-                model=self.model,
+            response = await self.client.messages.create(
+                model=self.fast_model,
                 max_tokens=50,
                 temperature=0.3,
                 messages=[{"role": "user", "content": prompt}]
@@ -437,7 +1132,7 @@ Respond with ONLY the category name, nothing else.
             return "General"
     
     
-    def detect_procrastination(
+    async def detect_procrastination(
         self,
         user_message: str,
         user: User,
@@ -458,6 +1153,14 @@ Respond with ONLY the category name, nothing else.
             if pending_urgent_tasks == 0:
                 return False, None
             
+            # Obvious cases don't need Claude
+            if _WORK_RE.search(user_message):
+                return False, None
+            
+            if _PROCRASTINATION_RE.search(user_message):
+                logger.info("🎯 Procrastination detected by keyword")
+                return True, "Focus on your urgent tasks first."
+            
             prompt = f"""Is this person procrastinating?
 
 They have {pending_urgent_tasks} urgent tasks pending.
@@ -468,31 +1171,19 @@ Is this:
 a) Productive (relevant to their work/goals)
 b) Procrastination (distraction from what they should do)
 
-Respond with JSON:
-{{
-  "is_procrastinating": true/false,
-  "reasoning": "brief explanation",
-  "redirect_suggestion": "what they should focus on instead"
-}}
+Record your answer with the emit_verdict tool.
 """
             
-            response = self.client.messages.create(
-                model=self.model,
+            response = await self.client.messages.create(
+                model=self.fast_model,
                 max_tokens=300,
                 temperature=0.4,
-                messages=[{"role": "user", "content": prompt}]
+                messages=[{"role": "user", "content": prompt}],
+                tools=[_VERDICT_TOOL],
+                tool_choice={"type": "tool", "name": _VERDICT_TOOL["name"]}
             )
             
-            import json
-            result_text = response.content[0].text.strip()
-            
-            if result_text.startswith("```"):
-                result_text = result_text.split("```")[1]
-                if result_text.startswith("json"):
-                    result_text = result_text[4:]
-                result_text = result_text.strip()
-            
-            result = json.loads(result_text)
+            result = self._tool_input(response)
             
             is_procrastinating = result.get("is_procrastinating", False)
             redirect = result.get("redirect_suggestion") if is_procrastinating else None
@@ -14,7 +14,8 @@ Messages are organized by:
 By OkayYouGotMe
 """
 
-from typing import Dict
+import string
+from typing import Dict, List, Optional, Tuple
 
 # ============================================
 # WELCOME & ONBOARDING
@@ -396,6 +397,28 @@ Just talk to me naturally! 💬"""
 # UTILITY FUNCTIONS
 # ============================================
 
+_FORMATTER = string.Formatter()
+
+# Parsed templates: (literal, field_name, format_spec, conversion) tuples
+_COMPILED: Dict[str, List[Tuple[str, Optional[str], str, Optional[str]]]] = {}
+
+
+def _compile(template: str) -> List[Tuple[str, Optional[str], str, Optional[str]]]:
+    """
+    Parse a template's placeholders once and reuse the result.
+    
+    Args:
+        template: Message template with {placeholders}
+    
+    Returns:
+        List of parsed (literal, field_name, format_spec, conversion) tuples
+    """
+    parts = _COMPILED.get(template)
+    if parts is None:
+        parts = _COMPILED[template] = list(_FORMATTER.parse(template))
+    return parts
+
+
 def get_message(message_dict: Dict[str, str], motivation_style: str, **kwargs) -> str:
     """
     Get the appropriate message based on user's motivation style.
@@ -409,4 +432,21 @@ def get_message(message_dict: Dict[str, str], motivation_style: str, **kwargs) -
         Formatted message string
     """
     template = message_dict.get(motivation_style, message_dict.get('factual'))
-    return template.format(**kwargs)
+    
+    parts = []
+    for literal, field, spec, conversion in _compile(template):
+        parts.append(literal)
+        
+        if field is not None:
+            value = kwargs[field]
+            if conversion:
+                value = _FORMATTER.convert_field(value, conversion)
+            parts.append(format(value, spec) if spec else str(value))
+    
+    return "".join(parts)
+
+
+# Parse every per-style template up front, so no send pays for it
+for _message_dict in (TASK_ADDED, TASK_COMPLETED, TASK_SKIPPED, REMINDER_SET):
+    for _template in _message_dict.values():
+        _compile(_template)
@@ -8,20 +8,33 @@ Handles all user interactions through Telegram.
 By OkayYouGotMe
 """
 
+import asyncio
+import functools
 import logging
+import re
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from telegram import Update
+from telegram.error import BadRequest, RetryAfter
 from telegram.ext import (
     Application, CommandHandler, MessageHandler,
     filters, ContextTypes
 )
-from typing import Optional
+from telegram.request import HTTPXRequest
+from typing import Dict, List, Optional, Set
+from cachetools import TTLCache
 
-from config.settings import TELEGRAM_BOT_TOKEN
+from config.settings import (
+    TELEGRAM_BOT_TOKEN, TELEGRAM_POOL_SIZE, DB_POOL_SIZE, MAX_CONCURRENT_CHATS,
+    LAST_ACTIVE_FLUSH_INTERVAL, CONVERSATION_FLUSH_INTERVAL, REMINDER_FLUSH_INTERVAL
+)
 from database.operations import (
     get_user_by_telegram_id, create_user,
     create_task, mark_task_complete, get_pending_tasks,
-    create_idea, get_user_ideas, get_completion_stats,
-    save_conversation
+    create_idea, get_recent_ideas, get_user_dashboard,
+    queue_conversation, flush_conversations, flush_last_active, flush_reminder_updates
 )
 from ai.claude_engine import claude
 from features.onboarding import onboarding
@@ -32,6 +45,56 @@ from bot.messages import (
 
 logger = logging.getLogger(__name__)
 
+# How often a streaming reply is edited with new text (seconds)
+STREAM_EDIT_INTERVAL = 0.2
+
+# "OTR:", "Idea:", "Remember:" or "Save this:" at the start of an idea
+IDEA_PREFIX_RE = re.compile(r'^(?:OTR|Idea|Remember|Save this)\s*:\s*', re.IGNORECASE)
+
+# Short, repeated messages ("show my tasks") reuse their last routed intent
+# instead of asking Claude again. Chat replies are never cached.
+INTENT_CACHE_MAX_CHARS = 40
+INTENT_CACHE_TTL = 600  # seconds
+ROUTED_INTENTS = frozenset({
+    'add_task', 'complete_task', 'add_idea', 'view_tasks', 'view_ideas'
+})
+
+# Task names shorter than this ("buy milk") are never worth breaking down,
+# so they skip the Claude call
+BREAKDOWN_MIN_WORDS = 4
+BREAKDOWN_MIN_CHARS = 25
+
+
+def _motivation_of(user) -> str:
+    """Get the user's motivation style name for message templates"""
+    return user.motivation_style or "direct"
+
+
+@functools.lru_cache(maxsize=4096)
+def _format_due_date(due_date: datetime) -> str:
+    """Format a due date for task lists (cached - the same tasks are listed over and over)"""
+    return f"{due_date:%b %d, %I:%M %p}"
+
+
+def _replies_on_error(action: str, error_reply: str):
+    """
+    Wrap a handler so any error is logged and answered with a fallback reply.
+    
+    Args:
+        action: What failed, for the log line (e.g. "in /tasks")
+        error_reply: Message sent to the user when the handler raises
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(self, update: Update, *args):
+            try:
+                return await handler(self, update, *args)
+            except Exception as e:
+                logger.error(f"❌ Error {action}: {e}")
+                await update.message.reply_text(error_reply)
+        return wrapper
+    return decorator
+
 
 class TelegramBot:
     """
@@ -42,11 +105,77 @@ class TelegramBot:
     
     def __init__(self):
         """Initialize the Telegram bot"""
-        self.application = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+        # One pooled keep-alive client for everything the bot sends, and a
+        # separate one for long polling so it never waits behind replies
+        self.application = (
+            Application.builder()
+            .token(TELEGRAM_BOT_TOKEN)
+            .request(HTTPXRequest(connection_pool_size=TELEGRAM_POOL_SIZE, http_version="1.1"))
+            .get_updates_request(HTTPXRequest(connection_pool_size=1, http_version="1.1"))
+            .post_init(self._post_init)
+            .post_shutdown(self._post_shutdown)
+            .build()
+        )
         self._setup_handlers()
+        
+        # Set to make start() shut down
+        self._stop = asyncio.Event()
+        
+        # Per-chat message queues, each drained in order by its own worker
+        self._chat_queues: Dict[str, "asyncio.Queue[Update]"] = {}
+        self._chat_workers: Set["asyncio.Task"] = set()
+        self._chat_slots: Optional["asyncio.Semaphore"] = None  # Created on the running loop
+        
+        # Routed intents for short messages: (user_id, message) -> intent result
+        self._intent_cache = TTLCache(maxsize=2048, ttl=INTENT_CACHE_TTL)
+        
+        # Periodic writers for batched database updates (started in _post_init)
+        self._flush_tasks: List["asyncio.Task"] = []
+        
         logger.info("🤖 Telegram Bot initialized")
     
     
+    async def _post_init(self, application: Application):
+        """
+        Prepare the event loop once the application is initialized.
+        
+        Database calls run in worker threads (asyncio.to_thread) so a slow
+        query never blocks other chats. Size that thread pool to match the
+        database connection pool.
+        """
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix="db")
+        )
+        self._flush_tasks = [
+            asyncio.create_task(self._flush_periodically(flush_conversations, CONVERSATION_FLUSH_INTERVAL)),
+            asyncio.create_task(self._flush_periodically(flush_last_active, LAST_ACTIVE_FLUSH_INTERVAL)),
+            asyncio.create_task(self._flush_periodically(flush_reminder_updates, REMINDER_FLUSH_INTERVAL)),
+        ]
+    
+    
+    async def _post_shutdown(self, application: Application):
+        """Write any conversations, last_active times and reminder updates still waiting in memory"""
+        for task in self._flush_tasks:
+            task.cancel()
+        while await asyncio.to_thread(flush_conversations):
+            pass
+        await asyncio.to_thread(flush_last_active)
+        await asyncio.to_thread(flush_reminder_updates)
+    
+    
+    async def _flush_periodically(self, flush, interval: float):
+        """
+        Run a batched database write every interval seconds.
+        
+        Args:
+            flush: Blocking flush function, returning how many rows it wrote
+            interval: Seconds between flushes
+        """
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(flush)
+    
+    
     def _setup_handlers(self):
         """Set up all command and message handlers"""
         
@@ -65,53 +194,49 @@ class TelegramBot:
         logger.info("✅ Bot handlers configured")
     
     
+    @_replies_on_error("in /start", "Oops! Something went wrong. Try again?")
     async def cmd_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """
         Handle /start command.
         
         First contact with user - start onboarding or welcome back.
         """
-        try:
-            telegram_id = str(update.effective_chat.id)
-            user = get_user_by_telegram_id(telegram_id)
-            
-            if not user:
-                # New user - start onboarding
-                user, welcome_msg = onboarding.start_onboarding(telegram_id)
+        telegram_id = str(update.effective_chat.id)
+        user = await asyncio.to_thread(get_user_by_telegram_id, telegram_id)
+        
+        if not user:
+            # New user - start onboarding
+            user, welcome_msg = await asyncio.to_thread(onboarding.start_onboarding, telegram_id)
+            await update.message.reply_text(welcome_msg)
+            logger.info(f"👋 New user started: {telegram_id}")
+        
+        elif not user.onboarding_completed:
+            # User exists but didn't finish onboarding
+            question = onboarding.get_current_question(user)
+            if question:
+                await update.message.reply_text(
+                    f"Welcome back! Let's continue your setup.\n\n{question}"
+                )
+            else:
+                # Onboarding somehow incomplete, restart
+                user, welcome_msg = await asyncio.to_thread(onboarding.start_onboarding, telegram_id)
                 await update.message.reply_text(welcome_msg)
-                logger.info(f"👋 New user started: {telegram_id}")
-            
-            elif not user.onboarding_completed:
-                # User exists but didn't finish onboarding
-                question = onboarding.get_current_question(user)
-                if question:
-                    await update.message.reply_text(
-                        f"Welcome back! Let's continue your setup.\n\n{question}"
-                    )
-                else:
-                    # Onboarding somehow incomplete, restart
-                    user, welcome_msg = onboarding.start_onboarding(telegram_id)
-                    await update.message.reply_text(welcome_msg)
+        
+        else:
+            # Existing user - welcome back
+            pending = len(await asyncio.to_thread(get_pending_tasks, user.id))
             
+            welcome_back = f"Welcome back, {user.name}! 👋\n\n"
+            
+            if pending > 0:
+                welcome_back += f"You have {pending} pending task{'s' if pending != 1 else ''}.\n\n"
             else:
-                # Existing user - welcome back
-                pending = len(get_pending_tasks(user.id))
-                
-                welcome_back = f"Welcome back, {user.name}! 👋\n\n"
-                
-                if pending > 0:
-                    welcome_back += f"You have {pending} pending task{'s' if pending != 1 else ''}.\n\n"
-                else:
-                    welcome_back += "You're all caught up! No pending tasks.\n\n"
-                
-                welcome_back += "Type /help to see what I can do!"
-                
-                await update.message.reply_text(welcome_back)
-                logger.info(f"👋 Returning user: {user.name} ({telegram_id})")
-        
-        except Exception as e:
-            logger.error(f"❌ Error in /start: {e}")
-            await update.message.reply_text("Oops! Something went wrong. Try again?")
+                welcome_back += "You're all caught up! No pending tasks.\n\n"
+            
+            welcome_back += "Type /help to see what I can do!"
+            
+            await update.message.reply_text(welcome_back)
+            logger.info(f"👋 Returning user: {user.name} ({telegram_id})")
     
     
     async def cmd_help(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -120,167 +245,214 @@ class TelegramBot:
         logger.info(f"❓ Help requested by {update.effective_chat.id}")
     
     
+    @_replies_on_error("in /tasks", "Couldn't fetch tasks. Try again?")
     async def cmd_tasks(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /tasks command - show pending tasks"""
-        try:
-            telegram_id = str(update.effective_chat.id)
-            user = get_user_by_telegram_id(telegram_id)
-            
-            if not user:
-                await update.message.reply_text("You're not set up yet! Send /start to begin.")
-                return
-            
-            tasks = get_pending_tasks(user.id)
-            
-            if not tasks:
-                await update.message.reply_text(
-                    "No pending tasks! You're all caught up! 🎉\n\n"
-                    "Want to add one? Just tell me what to do!"
-                )
-                return
-            
-            # Build task list
-            message = "📋 YOUR PENDING TASKS:\n\n"
+        telegram_id = str(update.effective_chat.id)
+        user = await asyncio.to_thread(get_user_by_telegram_id, telegram_id)
+        
+        if not user:
+            await update.message.reply_text("You're not set up yet! Send /start to begin.")
+            return
+        
+        tasks = await asyncio.to_thread(get_pending_tasks, user.id)
+        
+        if not tasks:
+            await update.message.reply_text(
+                "No pending tasks! You're all caught up! 🎉\n\n"
+                "Want to add one? Just tell me what to do!"
+            )
+            return
+        
+        # Build task list
+        parts = ["📋 YOUR PENDING TASKS:\n\n"]
+        
+        for idx, task in enumerate(tasks, 1):
+            parts.append(f"{idx}. {task.task_name}\n")
             
-            for idx, task in enumerate(tasks, 1):
-                message += f"{idx}. {task.task_name}\n"
-                
-                if task.due_date:
-                    message += f"   Due: {task.due_date.strftime('%b %d, %I:%M %p')}\n"
-                
-                if task.priority.value != "normal":
-                    message += f"   Priority: {task.priority.value}\n"
-                
-                message += "\n"
+            if task.due_date:
+                parts.append(f"   Due: {_format_due_date(task.due_date)}\n")
             
-            message += f"Total: {len(tasks)} task{'s' if len(tasks) != 1 else ''}\n\n"
-            message += "Reply 'task X done' when you complete one!"
+            if task.priority != "normal":
+                parts.append(f"   Priority: {task.priority}\n")
             
-            await update.message.reply_text(message)
-            logger.info(f"📋 Showed {len(tasks)} tasks to {user.name}")
+            parts.append("\n")
         
-        except Exception as e:
-            logger.error(f"❌ Error in /tasks: {e}")
-            await update.message.reply_text("Couldn't fetch tasks. Try again?")
+        parts.append(f"Total: {len(tasks)} task{'s' if len(tasks) != 1 else ''}\n\n")
+        parts.append("Reply 'task X done' when you complete one!")
+        
+        message = "".join(parts)
+        
+        await update.message.reply_text(message)
+        logger.info(f"📋 Showed {len(tasks)} tasks to {user.name}")
     
     
+    @_replies_on_error("in /ideas", "Couldn't fetch ideas. Try again?")
     async def cmd_ideas(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /ideas command - show saved ideas"""
-        try:
-            telegram_id = str(update.effective_chat.id)
-            user = get_user_by_telegram_id(telegram_id)
-            
-            if not user:
-                await update.message.reply_text("You're not set up yet! Send /start to begin.")
-                return
-            
-            ideas = get_user_ideas(user.id)
-            
-            if not ideas:
-                await update.message.reply_text(
-                    "No ideas saved yet!\n\n"
-                    "Start with 'OTR: your idea' or 'Idea: something cool'"
-                )
-                return
-            
-            # Build ideas list
-            message = "💡 YOUR SAVED IDEAS:\n\n"
-            
-            for idx, idea in enumerate(ideas[:10], 1):  # Show max 10
-                message += f"{idx}. {idea.idea_text}\n"
-                message += f"   Category: {idea.category}\n\n"
-            
-            if len(ideas) > 10:
-                message += f"...and {len(ideas) - 10} more\n\n"
-            
-            message += f"Total: {len(ideas)} idea{'s' if len(ideas) != 1 else ''}"
-            
-            await update.message.reply_text(message)
-            logger.info(f"💡 Showed {len(ideas)} ideas to {user.name}")
+        telegram_id = str(update.effective_chat.id)
+        user = await asyncio.to_thread(get_user_by_telegram_id, telegram_id)
         
-        except Exception as e:
-            logger.error(f"❌ Error in /ideas: {e}")
-            await update.message.reply_text("Couldn't fetch ideas. Try again?")
+        if not user:
+            await update.message.reply_text("You're not set up yet! Send /start to begin.")
+            return
+        
+        ideas, total = await asyncio.to_thread(get_recent_ideas, user.id, 10)
+        
+        if not ideas:
+            await update.message.reply_text(
+                "No ideas saved yet!\n\n"
+                "Start with 'OTR: your idea' or 'Idea: something cool'"
+            )
+            return
+        
+        # Build ideas list
+        parts = ["💡 YOUR SAVED IDEAS:\n\n"]
+        
+        for idx, idea in enumerate(ideas, 1):  # Show max 10
+            parts.append(f"{idx}. {idea.idea_text}\n   Category: {idea.category}\n\n")
+        
+        if total > len(ideas):
+            parts.append(f"...and {total - len(ideas)} more\n\n")
+        
+        parts.append(f"Total: {total} idea{'s' if total != 1 else ''}")
+        
+        message = "".join(parts)
+        
+        await update.message.reply_text(message)
+        logger.info(f"💡 Showed {len(ideas)} of {total} ideas to {user.name}")
     
     
+    @_replies_on_error("in /stats", "Couldn't fetch stats. Try again?")
     async def cmd_stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /stats command - show statistics"""
-        try:
-            telegram_id = str(update.effective_chat.id)
-            user = get_user_by_telegram_id(telegram_id)
-            
-            if not user:
-                await update.message.reply_text("You're not set up yet! Send /start to begin.")
-                return
-            
-            # Get stats for last 30 days
-            stats = get_completion_stats(user.id, days=30)
-            pending = len(get_pending_tasks(user.id))
-            ideas = len(get_user_ideas(user.id))
-            
-            message = f"📊 YOUR STATS (Last 30 Days)\n\n"
-            message += f"Tasks Completed: {stats['completed_count']}\n"
-            message += f"Completion Rate: {stats['completion_rate']}%\n"
-            message += f"On-Time Rate: {stats['on_time_rate']}%\n\n"
-            message += f"Pending Tasks: {pending}\n"
-            message += f"Saved Ideas: {ideas}\n\n"
-            
-            # Add encouragement based on completion rate
-            rate = stats['completion_rate']
-            if rate >= 80:
-                message += "🔥 You're CRUSHING it! Keep it up!"
-            elif rate >= 60:
-                message += "💪 Solid work! You're making progress!"
-            elif rate >= 40:
-                message += "👍 Not bad, but there's room to improve!"
-            else:
-                message += "⚠️ Let's step it up! You can do better!"
-            
-            await update.message.reply_text(message)
-            logger.info(f"📊 Showed stats to {user.name}")
+        telegram_id = str(update.effective_chat.id)
+        user = await asyncio.to_thread(get_user_by_telegram_id, telegram_id)
         
-        except Exception as e:
-            logger.error(f"❌ Error in /stats: {e}")
-            await update.message.reply_text("Couldn't fetch stats. Try again?")
+        if not user:
+            await update.message.reply_text("You're not set up yet! Send /start to begin.")
+            return
+        
+        # Get stats for last 30 days (one query)
+        stats = await asyncio.to_thread(get_user_dashboard, user.id, days=30)
+        
+        message = f"📊 YOUR STATS (Last 30 Days)\n\n"
+        message += f"Tasks Completed: {stats['completed_count']}\n"
+        message += f"Completion Rate: {stats['completion_rate']}%\n"
+        message += f"On-Time Rate: {stats['on_time_rate']}%\n\n"
+        message += f"Pending Tasks: {stats['pending_count']}\n"
+        message += f"Saved Ideas: {stats['ideas_count']}\n\n"
+        
+        # Add encouragement based on completion rate
+        rate = stats['completion_rate']
+        if rate >= 80:
+            message += "🔥 You're CRUSHING it! Keep it up!"
+        elif rate >= 60:
+            message += "💪 Solid work! You're making progress!"
+        elif rate >= 40:
+            message += "👍 Not bad, but there's room to improve!"
+        else:
+            message += "⚠️ Let's step it up! You can do better!"
+        
+        await update.message.reply_text(message)
+        logger.info(f"📊 Showed stats to {user.name}")
     
     
     async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """
         Handle regular text messages.
         
-        This is where the AI magic happens!
+        Queues the message for its chat and returns right away, so a slow
+        AI turn in one chat doesn't hold up updates for the others.
+        """
+        telegram_id = str(update.effective_chat.id)
+        
+        queue = self._chat_queues.get(telegram_id)
+        if queue is None:
+            queue = self._chat_queues[telegram_id] = asyncio.Queue()
+            worker = asyncio.create_task(self._drain_chat_queue(telegram_id, queue))
+            self._chat_workers.add(worker)
+            worker.add_done_callback(self._chat_workers.discard)
+        
+        queue.put_nowait(update)
+    
+    
+    async def _drain_chat_queue(self, telegram_id: str, queue: "asyncio.Queue[Update]"):
         """
+        Process one chat's queued messages in order, then exit.
+        
+        Args:
+            telegram_id: Chat the queue belongs to
+            queue: Pending updates for that chat
+        """
+        if self._chat_slots is None:
+            self._chat_slots = asyncio.Semaphore(MAX_CONCURRENT_CHATS)
+        
         try:
-            telegram_id = str(update.effective_chat.id)
-            user_message = update.message.text
-            
-            logger.info(f"💬 Message from {telegram_id}: {user_message[:50]}...")
-            
-            # Get or create user
-            user = get_user_by_telegram_id(telegram_id)
-            
-            if not user:
-                # New user - start onboarding
-                user, welcome_msg = onboarding.start_onboarding(telegram_id)
-                await update.message.reply_text(welcome_msg)
-                return
+            while not queue.empty():
+                update = queue.get_nowait()
+                async with self._chat_slots:
+                    await self._process_message(update)
+        finally:
+            self._chat_queues.pop(telegram_id, None)
+    
+    
+    @_replies_on_error("handling message", ERROR_NOT_UNDERSTOOD)
+    async def _process_message(self, update: Update):
+        """
+        Handle one text message.
+        
+        This is where the AI magic happens!
+        
+        Args:
+            update: Telegram update
+        """
+        telegram_id = str(update.effective_chat.id)
+        user_message = update.message.text
+        
+        logger.info(f"💬 Message from {telegram_id}: {user_message[:50]}...")
+        
+        # Get or create user
+        user = await asyncio.to_thread(get_user_by_telegram_id, telegram_id)
+        
+        if not user:
+            # New user - start onboarding
+            user, welcome_msg = await asyncio.to_thread(onboarding.start_onboarding, telegram_id)
+            await update.message.reply_text(welcome_msg)
+            return
+        
+        # Check if user is in onboarding
+        if not user.onboarding_completed:
+            success, response, is_complete = await asyncio.to_thread(
+                onboarding.process_answer, user, user_message
+            )
+            await update.message.reply_text(response)
             
-            # Check if user is in onboarding
-            if not user.onboarding_completed:
-                success, response, is_complete = onboarding.process_answer(user, user_message)
-                await update.message.reply_text(response)
-                
-                if is_complete:
-                    logger.info(f"✅ User {user.name} completed onboarding")
-                
-                return
+            if is_complete:
+                logger.info(f"✅ User {user.name} completed onboarding")
             
-            # User is set up - process with AI
-            await self._process_with_ai(update, user, user_message)
+            return
         
-        except Exception as e:
-            logger.error(f"❌ Error handling message: {e}")
-            await update.message.reply_text(ERROR_NOT_UNDERSTOOD)
+        # User is set up - process with AI
+        await self._process_with_ai(update, user, user_message)
+    
+    
+    async def _load_ai_context(self, user) -> dict:
+        """
+        Load the per-turn stats Claude sees alongside the message.
+        
+        Args:
+            user: User object
+        
+        Returns:
+            Context dict for the Claude engine
+        """
+        stats = await asyncio.to_thread(get_user_dashboard, user.id, days=7)
+        
+        return {
+            'pending_tasks': stats['pending_count'],
+            'completion_rate': stats['completion_rate']
+        }
     
     
     async def _process_with_ai(self, update: Update, user, user_message: str):
@@ -293,17 +465,25 @@ class TelegramBot:
             user_message: What the user said
         """
         try:
-            # Get context
-            pending_tasks = get_pending_tasks(user.id)
-            stats = get_completion_stats(user.id, days=7)
-            
-            context = {
-                'pending_tasks': len(pending_tasks),
-                'completion_rate': stats['completion_rate']
-            }
+            # Short messages without numbers (task numbers, times) are safe to reuse
+            cache_key = None
+            normalized = user_message.strip().lower()
+            if len(normalized) <= INTENT_CACHE_MAX_CHARS and not any(c.isdigit() for c in normalized):
+                cache_key = (user.id, normalized)
+            
+            intent_result = self._intent_cache.get(cache_key) if cache_key else None
+            context = None
+            
+            if intent_result is None:
+                # Load context (one query) while Claude's request is put together
+                context = asyncio.ensure_future(self._load_ai_context(user))
+                
+                # Analyze intent (and draft a reply) in one call
+                intent_result = await claude.analyze_and_respond(user_message, user, context)
+                
+                if cache_key and intent_result.get('intent') in ROUTED_INTENTS:
+                    self._intent_cache[cache_key] = intent_result
             
-            # Analyze intent
-            intent_result = claude.analyze_intent(user_message, user)
             intent = intent_result.get('intent', 'chat')
             
             logger.info(f"🧠 Intent: {intent}")
@@ -325,25 +505,110 @@ class TelegramBot:
                 await self.cmd_ideas(update, None)
             
             else:
-                # Generate AI response
-                response = claude.generate_response(user_message, user, context)
-                await update.message.reply_text(response)
+                # Use the drafted reply, or stream one if it came back empty
+                response = intent_result.get('reply')
+                if response:
+                    await update.message.reply_text(response)
+                else:
+                    response = await self._reply_streaming(
+                        update, claude.stream_response(user_message, user, context)
+                    )
                 
-                # Save conversation
-                save_conversation(user.id, user_message, response, intent)
+                # Save conversation (batched, off the reply path)
+                queue_conversation(user.id, user_message, response, intent)
+                claude.remember_turn(user.id, user_message, response)
         
         except Exception as e:
             logger.error(f"❌ Error in AI processing: {e}")
             await update.message.reply_text("Hmm, I'm having trouble understanding. Can you rephrase?")
     
     
+    async def _reply_streaming(self, update: Update, chunks) -> str:
+        """
+        Send a reply that fills in while the AI is still writing it.
+        
+        The first text is sent as a new message, then that message is
+        edited at most every STREAM_EDIT_INTERVAL seconds as chunks arrive.
+        
+        Args:
+            update: Telegram update
+            chunks: Async iterator of text chunks
+        
+        Returns:
+            The complete reply text
+        """
+        text = ""
+        shown = ""
+        message = None
+        next_edit = 0.0
+        
+        async for chunk in chunks:
+            text += chunk
+            
+            # Telegram rejects empty messages and strips trailing whitespace,
+            # so an edit that only adds whitespace is a no-op it refuses
+            if (
+                not text.strip()
+                or text.rstrip() == shown.rstrip()
+                or time.monotonic() < next_edit
+            ):
+                continue
+            
+            if message is None:
+                message = await update.message.reply_text(text)
+                backoff = None
+            else:
+                backoff = await self._edit_stream_message(message, text)
+            
+            if backoff is None:
+                shown = text
+            next_edit = time.monotonic() + max(backoff or 0, STREAM_EDIT_INTERVAL)
+        
+        text = text.strip()
+        
+        # Flush whatever arrived after the last edit
+        if message is None:
+            await update.message.reply_text(text or ERROR_NOT_UNDERSTOOD)
+        elif text != shown.strip():
+            backoff = await self._edit_stream_message(message, text)
+            if backoff is not None:
+                await asyncio.sleep(backoff)
+                await self._edit_stream_message(message, text)
+        
+        return text
+    
+    
+    async def _edit_stream_message(self, message, text: str) -> Optional[float]:
+        """
+        Edit a streaming reply, tolerating Telegram's edit errors.
+        
+        Args:
+            message: The reply message being filled in
+            text: Text to show
+        
+        Returns:
+            Seconds to wait before retrying when rate limited, else None
+        """
+        try:
+            await message.edit_text(text)
+        except RetryAfter as e:
+            logger.warning(f"⚠️ Stream edit rate limited for {e.retry_after}s")
+            return e.retry_after
+        except BadRequest as e:
+            logger.warning(f"⚠️ Stream edit skipped: {e}")
+        return None
+    
+    
     async def _handle_add_task(self, update: Update, user, intent_result: dict):
         """Handle adding a new task"""
         try:
             task_name = intent_result.get('task_name', update.message.text)
             
-            # Check if task should be broken down
-            breakdown = claude.break_down_task(task_name, user)
+            # Check if task should be broken down (short names obviously shouldn't)
+            if len(task_name) < BREAKDOWN_MIN_CHARS or len(task_name.split()) < BREAKDOWN_MIN_WORDS:
+                breakdown = {'should_break_down': False}
+            else:
+                breakdown = await claude.break_down_task(task_name, user)
             
             if breakdown.get('should_break_down') and breakdown.get('subtasks'):
                 # Offer to break it down
@@ -361,12 +626,12 @@ class TelegramBot:
                 return
             
             # Create task
-            task = create_task(user.id, task_name)
+            task = await asyncio.to_thread(create_task, user.id, task_name)
             
             if task:
                 # Get appropriate message based on motivation style
-                motivation = user.motivation_style.value if user.motivation_style else "direct"
-                total_tasks = len(get_pending_tasks(user.id))
+                motivation = _motivation_of(user)
+                total_tasks = len(await asyncio.to_thread(get_pending_tasks, user.id))
                 
                 response = get_message(
                     TASK_ADDED,
@@ -395,18 +660,17 @@ class TelegramBot:
                 # User said "task 1 done"
                 try:
                     task_num = int(task_id_str)
-                    tasks = get_pending_tasks(user.id)
+                    tasks = await asyncio.to_thread(get_pending_tasks, user.id)
                     
                     if 0 < task_num <= len(tasks):
                         task = tasks[task_num - 1]
                         
-                        if mark_task_complete(task.id):
-                            motivation = user.motivation_style.value if user.motivation_style else "direct"
-                            remaining = len(get_pending_tasks(user.id))
-                            
+                        completed, remaining = await asyncio.to_thread(mark_task_complete, task.id)
+                        
+                        if completed:
                             response = get_message(
                                 TASK_COMPLETED,
-                                motivation,
+                                _motivation_of(user),
                                 task_name=task.task_name,
                                 remaining_tasks=remaining
                             )
@@ -434,16 +698,13 @@ class TelegramBot:
             idea_text = intent_result.get('idea', update.message.text)
             
             # Remove OTR prefix if present
-            for prefix in ['OTR:', 'Idea:', 'Remember:', 'Save this:']:
-                if idea_text.startswith(prefix):
-                    idea_text = idea_text[len(prefix):].strip()
-                    break
+            idea_text = IDEA_PREFIX_RE.sub('', idea_text, count=1).strip()
             
             # Auto-categorize
-            category = claude.categorize_idea(idea_text, user)
+            category = await claude.categorize_idea(idea_text, user)
             
             # Save idea
-            idea = create_idea(user.id, idea_text, category)
+            idea = await asyncio.to_thread(create_idea, user.id, idea_text, category)
             
             if idea:
                 response = f"💡 Idea Saved!\n\n{idea_text}\n\nCategory: {category}"
@@ -478,29 +739,45 @@ class TelegramBot:
     
     
     async def start(self):
-        """Start the bot (async)"""
+        """
+        Start the bot (async).
+        
+        Runs until stop() is called or the process gets SIGINT/SIGTERM.
+        """
         logger.info("🚀 Starting Telegram bot...")
         await self.application.initialize()
+        await self._post_init(self.application)
         await self.application.start()
         await self.application.updater.start_polling()
         
+        # Shut down cleanly on Ctrl+C or a platform stop (Railway sends SIGTERM)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except NotImplementedError:
+                pass  # Windows - Ctrl+C still raises KeyboardInterrupt
+        
         # Keep running
         try:
-            while True:
-                await asyncio.sleep(1)
+            await self._stop.wait()
         except asyncio.CancelledError:
             pass
         finally:
+            logger.info("🛑 Stopping Telegram bot...")
             await self.application.updater.stop()
             await self.application.stop()
+            await self._post_shutdown(self.application)
             await self.application.shutdown()
     
     
+    def stop(self):
+        """Ask a running start() to shut down"""
+        self._stop.set()
+    
+    
     def run(self):
         """Run the bot (blocking)"""
         logger.info("🚀 Starting Telegram bot in blocking mode...")
         self.application.run_polling()
 
-
-# Import asyncio at the end to avoid circular imports
-import asyncio
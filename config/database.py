@@ -9,41 +9,31 @@ By OkayYouGotMe
 
 import logging
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool
 
-from config.settings import DATABASE_URL
+from config.settings import (
+    DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE, SERVERLESS
+)
 
 logger = logging.getLogger(__name__)
 
 # Create engine
-# NullPool for serverless environments (Railway, Render)
-engine = create_engine(
-    DATABASE_URL,
-    poolclass=NullPool,
-    echo=False  # Set to True for SQL debugging
-)
-
-# Create session factory
-SessionLocal = sessionmaker(
-    autocommit=False,
-    autoflush=False,
-    bind=engine
-)
+if SERVERLESS:
+    # NullPool for short-lived serverless runs - nothing to keep warm
+    engine = create_engine(
+        DATABASE_URL,
+        poolclass=NullPool,
+        echo=False  # Set to True for SQL debugging
+    )
+else:
+    # The bot is a long-running process - keep connections open and reuse them
+    engine = create_engine(
+        DATABASE_URL,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=True,  # Drop dead connections before using them
+        pool_recycle=DB_POOL_RECYCLE,
+        echo=False  # Set to True for SQL debugging
+    )
 
 logger.info("✅ Database connection configured")
-
-
-def get_db():
-    """
-    Get database session.
-    
-    Usage:
-        with get_db() as db:
-            # do database operations
-    """
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
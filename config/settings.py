@@ -10,8 +10,12 @@ No need to dig through code - everything is here.
 By OkayYouGotMe
 """
 
+import logging
 import os
-from typing import Dict, List
+from itertools import accumulate
+from typing import Dict, Tuple
+
+logger = logging.getLogger(__name__)
 
 # ============================================
 # CORE CREDENTIALS
@@ -33,13 +37,34 @@ WEATHER_API_KEY = os.getenv("WEATHER_API_KEY", "")
 # Claude Model to Use
 CLAUDE_MODEL = "claude-sonnet-4-20250514"  # Latest Sonnet model
 
+# Cheaper, faster model for simple classification jobs
+# (intent detection, idea categories, procrastination checks)
+CLAUDE_MODEL_FAST = "claude-3-5-haiku-20241022"
+
 # AI Creativity Level (0.0 = robotic, 1.0 = very creative)
 # 0.7 is a good balance for task management
 AI_TEMPERATURE = 0.7
 
 # How many previous messages to remember in conversation
 # Higher = more context, but slower responses
-MAX_CONVERSATION_MEMORY = 10
+# Must cover the history window plus HISTORY_CACHE_BUFFER below
+MAX_CONVERSATION_MEMORY = 20
+
+# Extra turns the history window may grow by before old turns are
+# summarized away. While it grows, the prompt prefix stays the same
+# and Claude's prompt cache keeps hitting.
+HISTORY_CACHE_BUFFER = 10
+
+# Recent history is kept in memory for active users so each message
+# doesn't need a database round-trip. Idle users drop out after the TTL.
+HISTORY_CACHE_USERS = 1000
+HISTORY_CACHE_TTL = 3600  # seconds
+
+# Users with a long profile (many goals, detailed schedule) get a compact
+# AI-written summary of it in the system prompt instead. It's rebuilt in
+# the background once a day, or when the profile changes.
+USER_PROFILE_TTL = 86400  # seconds
+USER_PROFILE_MIN_CHARS = 1200  # Shorter profiles are sent as-is
 
 # Brutal Honesty Level in Assessments
 # Options: "low" (gentle), "medium" (balanced), "high" (brutally honest)
@@ -77,25 +102,38 @@ MONTHLY_ASSESSMENT_TIME = "22:00"
 # ============================================
 
 # How often to nag for each priority level (in minutes)
-# Example: [0, 5, 10] means: remind immediately, then after 5 min, then after 10 min
+# Example: (0, 5, 10) means: remind immediately, then after 5 min, then after 10 min
 
-REMINDER_INTERVALS: Dict[str, List[int]] = {
+REMINDER_INTERVALS: Dict[str, Tuple[int, ...]] = {
     # Critical: Nag every 5 minutes until confirmed
-    'critical': [0, 5, 10, 15, 20],
+    'critical': (0, 5, 10, 15, 20),
     
     # Important: Nag 3 times total
-    'important': [0, 15, 30],
+    'important': (0, 15, 30),
     
     # Normal: Remind twice
-    'normal': [0, 30],
+    'normal': (0, 30),
     
     # Optional: Remind once only
-    'optional': [0]
+    'optional': (0,)
+}
+
+# The same, as minutes since the first reminder: (0, 5, 15) for the example
+# above. Nags are scheduled from these, so a slow send doesn't push back
+# every nag after it.
+REMINDER_NAG_OFFSETS: Dict[str, Tuple[int, ...]] = {
+    priority: tuple(accumulate(intervals))
+    for priority, intervals in REMINDER_INTERVALS.items()
 }
 
 # Maximum number of reminders before giving up
 MAX_REMINDER_ATTEMPTS = 5
 
+# The scheduler sleeps until the next reminder is due, but checks at least
+# this often (seconds) - reminders created outside ReminderScheduler.add_reminder()
+# don't wake it up
+REMINDER_MAX_SLEEP = 60
+
 
 # ============================================
 # TASK MANAGEMENT SETTINGS
@@ -124,6 +162,17 @@ SCORE_OUT_OF = 10
 # Minimum completion rate to be considered "good"
 GOOD_COMPLETION_RATE = 75  # 75%
 
+# Most assessments generated at the same time in a nightly batch
+# (each one is a Claude call, so this bounds API rate-limit pressure)
+MAX_CONCURRENT_ASSESSMENTS = 5
+
+# Identical assessment prompts (retries, a duplicate scheduler run) reuse
+# the earlier Claude response instead of calling the API again.
+# In memory, so each bot process keeps its own cache.
+CLAUDE_CACHE_ENABLED = os.getenv("CLAUDE_CACHE_ENABLED", "1") == "1"
+CLAUDE_CACHE_SIZE = 1000
+CLAUDE_CACHE_TTL = 3600  # seconds
+
 # Completion rate thresholds for different ratings
 COMPLETION_THRESHOLDS = {
     'excellent': 90,  # 90%+
@@ -275,12 +324,53 @@ LOG_FILE_PATH = "ai_assistant.log"
 DB_POOL_SIZE = 10
 DB_MAX_OVERFLOW = 20
 
+# Recycle pooled connections after this many seconds
+DB_POOL_RECYCLE = 1800
+
+# Set SERVERLESS=1 for short-lived runs (e.g. Railway cron jobs) to open
+# a fresh connection per session instead of keeping a pool
+SERVERLESS = os.getenv("SERVERLESS", "0") == "1"
+
+# Users looked up by Telegram ID are cached in memory for this long
+# (seconds), so each message doesn't cost a database round trip
+USER_CACHE_SIZE = 10_000
+USER_CACHE_TTL = 60
+
+# Completion stats and latest assessments per user are cached the same way
+# (dropped early whenever the user's tasks or assessments change)
+STATS_CACHE_SIZE = 10_000
+STATS_CACHE_TTL = 60
+
+# How often (seconds) batched "last active" times are written to the database
+LAST_ACTIVE_FLUSH_INTERVAL = 30
+
+# How often (seconds) batched reminder nag counts and statuses are written
+REMINDER_FLUSH_INTERVAL = 1
+
+# Conversations are saved in batches: every CONVERSATION_FLUSH_INTERVAL
+# seconds, at most CONVERSATION_FLUSH_BATCH rows per INSERT
+CONVERSATION_FLUSH_INTERVAL = 0.1
+CONVERSATION_FLUSH_BATCH = 50
+
 # API timeout (seconds)
 API_TIMEOUT = 30
 
 # Rate limiting (requests per minute per user)
 MAX_REQUESTS_PER_MINUTE = 30
 
+# How many chats can have a message in AI processing at the same time
+# (messages within one chat are always handled in order)
+MAX_CONCURRENT_CHATS = 16
+
+# Keep-alive connections the bot holds open to the Telegram API for
+# replies and notifications (polling uses its own connection)
+TELEGRAM_POOL_SIZE = 64
+
+# Most due reminders sent at the same time in one check. Each send holds
+# one of the Telegram connections above while it runs; leave enough for
+# replies to chats, so neither side waits for a free connection
+MAX_CONCURRENT_REMINDERS = TELEGRAM_POOL_SIZE - MAX_CONCURRENT_CHATS
+
 
 # ============================================
 # VALIDATION
@@ -290,6 +380,8 @@ def validate_config():
     """
     Check if all required settings are properly configured.
     Raises error if something is missing or invalid.
+    
+    Not run on import - the app calls it once at startup (see main.py).
     """
     errors = []
     
@@ -313,17 +405,12 @@ def validate_config():
     if BRUTAL_HONESTY_LEVEL not in ['low', 'medium', 'high']:
         errors.append("❌ BRUTAL_HONESTY_LEVEL must be 'low', 'medium', or 'high'")
     
-    # If there are errors, print them and raise exception
+    # If there are errors, log them and raise exception
     if errors:
-        print("\n⚠️  CONFIGURATION ERRORS:\n")
+        logger.error("⚠️  CONFIGURATION ERRORS:")
         for error in errors:
-            print(f"   {error}")
-        print("\n   Fix these in your .env file or Railway environment variables!\n")
+            logger.error(f"   {error}")
+        logger.error("   Fix these in your .env file or Railway environment variables!")
         raise ValueError("Configuration validation failed")
     
-    print("✅ Configuration validated successfully!")
-
-
-# Run validation when this file is imported
-if __name__ != "__main__":
-    validate_config()
+    logger.info("✅ Configuration validated successfully!")
@@ -12,16 +12,71 @@ By OkayYouGotMe
 
 from sqlalchemy import (
     Column, Integer, String, Text, DateTime, Boolean, 
-    ForeignKey, JSON, Enum as SQLEnum
+    ForeignKey, JSON, Index, CheckConstraint, Computed, case
 )
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from sqlalchemy.sql.expression import FunctionElement, Grouping
 import enum
 
 # Base class for all models
 Base = declarative_base()
 
+class utcnow(FunctionElement):
+    """
+    Current UTC time, computed by the database.
+    
+    Used as the server default for timestamp columns, so inserts don't
+    send a Python datetime. Stays naive UTC like every other time here.
+    """
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"  # Already UTC on SQLite
+
+
+@compiles(utcnow, "postgresql")
+def _utcnow_postgresql(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+
+class preference_flag(FunctionElement):
+    """
+    A true/false key read out of users.preferences, computed by the database.
+    
+    Used for generated columns that copy a hot preference out of the JSON,
+    so queries can filter (and index) it like any other column.
+    """
+    type = Boolean()
+    inherit_cache = True
+    
+    def __init__(self, key: str):
+        self.key = key
+        super().__init__()
+
+
+@compiles(preference_flag)
+def _preference_flag_default(element, compiler, **kw):
+    return f"json_extract(preferences, '$.{element.key}')"
+
+
+@compiles(preference_flag, "postgresql")
+def _preference_flag_postgresql(element, compiler, **kw):
+    return f"(preferences->>'{element.key}')::boolean"
+
+
+# JSON columns are stored as JSONB on PostgreSQL (parsed once on write,
+# indexable) and as plain JSON anywhere else
+JSONData = JSON().with_variant(JSONB(), "postgresql")
+
+# Longest message Telegram carries - conversation text is capped to this
+MESSAGE_MAX_LENGTH = 4096
+
 
 # ============================================
 # ENUMS (Predefined Options)
@@ -75,6 +130,36 @@ class ReminderStatus(enum.Enum):
     CANCELLED = "cancelled"   # User cancelled it
 
 
+def _one_of(column: str, choices: type[enum.Enum], name: str) -> CheckConstraint:
+    """
+    CHECK constraint that limits a string column to an enum's values.
+    
+    Enum fields are stored as plain strings (e.g. "pending") - cheaper to
+    read than database enum types, and new values don't need ALTER TYPE.
+    
+    Args:
+        column: Column name
+        choices: Enum whose values are allowed
+        name: Constraint name
+    """
+    values = ", ".join(f"'{choice.value}'" for choice in choices)
+    return CheckConstraint(f"{column} IN ({values})", name=name)
+
+
+def rank_of(column, choices: type[enum.Enum]):
+    """
+    Sortable rank for a string enum column (first enum member = 0).
+    
+    Queries that sort by rank must use this same expression, so the
+    index built on it can hand rows back already in order.
+    
+    Args:
+        column: Enum-valued string column
+        choices: Enum whose order gives the rank
+    """
+    return case({choice.value: rank for rank, choice in enumerate(choices)}, value=column)
+
+
 # ============================================
 # USER MODEL
 # ============================================
@@ -102,30 +187,51 @@ class User(Base):
     
     # Preferences
     timezone = Column(String(50), default="America/New_York")
-    motivation_style = Column(SQLEnum(MotivationStyle), default=MotivationStyle.DIRECT)
+    motivation_style = Column(String(20), default=MotivationStyle.DIRECT.value)  # MotivationStyle value
     
     # Goals (stored as JSON array)
     # Example: ["Get promoted", "Save for house", "Stay healthy"]
-    goals = Column(JSON, default=list)
+    goals = Column(JSONData, default=list)
     
     # Other preferences (stored as JSON object)
     # Example: {"hourly_checkins": true, "weekend_mode": false}
-    preferences = Column(JSON, default=dict)
+    preferences = Column(JSONData, default=dict)
+    # Copy of preferences["hourly_checkins"], kept up to date by the database.
+    # Read-only: change it through preferences.
+    hourly_checkins = Column(Boolean, Computed(preference_flag("hourly_checkins"), persisted=True))
     
     # Onboarding
     onboarding_completed = Column(Boolean, default=False)
     onboarding_step = Column(Integer, default=0)  # Current step in onboarding
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    last_active = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utcnow())
+    last_active = Column(DateTime, server_default=utcnow())
     
     # Relationships (links to other tables)
-    tasks = relationship("Task", back_populates="user", cascade="all, delete-orphan")
-    conversations = relationship("Conversation", back_populates="user", cascade="all, delete-orphan")
-    reminders = relationship("Reminder", back_populates="user", cascade="all, delete-orphan")
-    ideas = relationship("Idea", back_populates="user", cascade="all, delete-orphan")
-    assessments = relationship("Assessment", back_populates="user", cascade="all, delete-orphan")
+    # lazy="raise": users are loaded on every message, so touching one of
+    # these by accident must fail loudly instead of firing a hidden SELECT.
+    # Load them explicitly with selectinload() where they're needed.
+    tasks = relationship("Task", back_populates="user", cascade="all, delete-orphan", lazy="raise")
+    conversations = relationship("Conversation", back_populates="user", cascade="all, delete-orphan", lazy="raise")
+    reminders = relationship("Reminder", back_populates="user", cascade="all, delete-orphan", lazy="raise")
+    ideas = relationship("Idea", back_populates="user", cascade="all, delete-orphan", lazy="raise")
+    assessments = relationship("Assessment", back_populates="user", cascade="all, delete-orphan", lazy="raise")
+    
+    # Indexes and constraints
+    __table_args__ = (
+        _one_of("motivation_style", MotivationStyle, "ck_users_motivation_style"),
+        # Find users by preference with containment (preferences @> '{...}')
+        Index(
+            "ix_users_preferences_gin", preferences,
+            postgresql_using="gin", postgresql_ops={"preferences": "jsonb_path_ops"}
+        ).ddl_if(dialect="postgresql"),
+        # Only opted-in users are indexed - that's all the check-in scan wants
+        Index(
+            "ix_users_hourly_checkins", hourly_checkins,
+            postgresql_where=hourly_checkins
+        ),
+    )
     
     def __repr__(self):
         return f"<User(id={self.id}, name='{self.name}', telegram_id='{self.telegram_chat_id}')>"
@@ -158,8 +264,8 @@ class Task(Base):
     estimated_time = Column(Integer)  # Estimated minutes to complete
     
     # Status and priority
-    status = Column(SQLEnum(TaskStatus), default=TaskStatus.PENDING, index=True)
-    priority = Column(SQLEnum(TaskPriority), default=TaskPriority.NORMAL)
+    status = Column(String(20), default=TaskStatus.PENDING.value, index=True)  # TaskStatus value
+    priority = Column(String(20), default=TaskPriority.NORMAL.value)  # TaskPriority value
     
     # Subtask support
     parent_task_id = Column(Integer, ForeignKey("tasks.id"))
@@ -169,16 +275,41 @@ class Task(Base):
     category = Column(String(100))  # Example: "Work", "Personal", "Health"
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utcnow())
     completed_at = Column(DateTime)
     
     # Relationships
     user = relationship("User", back_populates="tasks")
-    parent_task = relationship("Task", remote_side=[id], backref="subtasks")
+    # Walking a task tree one lazy load per level is an N+1 - these raise,
+    # use get_task_tree() to fetch a whole subtree in one query
+    parent_task = relationship("Task", remote_side=[id], back_populates="subtasks", lazy="raise")
+    subtasks = relationship("Task", back_populates="parent_task", lazy="raise")
     reminders = relationship("Reminder", back_populates="task", cascade="all, delete-orphan")
     
+    # Indexes and constraints
+    __table_args__ = (
+        _one_of("status", TaskStatus, "ck_tasks_status"),
+        _one_of("priority", TaskPriority, "ck_tasks_priority"),
+        # Task lists filter on user + status and sort by due date. The listed
+        # columns ride along in the index, so PostgreSQL can answer /tasks
+        # with an index-only scan.
+        Index(
+            "ix_tasks_user_status_covering", user_id, status, due_date,
+            postgresql_include=["id", "task_name", "priority"]
+        ),
+        # Full task lists sort by priority rank, then due date - in the same
+        # order as this index, so PostgreSQL reads them off it without a sort.
+        # PostgreSQL only takes an expression in an index when it's in parentheses.
+        Index(
+            "ix_tasks_user_priority_due", user_id, status,
+            Grouping(rank_of(priority, TaskPriority)).desc(), due_date.asc().nullslast()
+        ).ddl_if(dialect="postgresql"),
+        # Stats count a user's tasks created since a date
+        Index("ix_tasks_user_created", user_id, created_at),
+    )
+    
     def __repr__(self):
-        return f"<Task(id={self.id}, name='{self.task_name}', status='{self.status.value}')>"
+        return f"<Task(id={self.id}, name='{self.task_name}', status='{self.status}')>"
 
 
 # ============================================
@@ -197,20 +328,32 @@ class Conversation(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     
-    # The actual messages
-    user_message = Column(Text, nullable=False)
-    ai_response = Column(Text, nullable=False)
+    # The actual messages (capped at MESSAGE_MAX_LENGTH). Stored inline
+    # (PostgreSQL STORAGE MAIN) so reading history doesn't need a second
+    # fetch from the TOAST table.
+    user_message = Column(String(MESSAGE_MAX_LENGTH), nullable=False, info={"storage": "main"})
+    ai_response = Column(String(MESSAGE_MAX_LENGTH), nullable=False, info={"storage": "main"})
     
     # AI's understanding of the message
     intent = Column(String(100))  # Example: "add_task", "complete_task", "chat"
-    context = Column(JSON)  # Additional context data
+    context = Column(JSONData)  # Additional context data
     
     # Timestamp
-    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+    timestamp = Column(DateTime, server_default=utcnow())
     
     # Relationship
     user = relationship("User", back_populates="conversations")
     
+    # Indexes
+    __table_args__ = (
+        # History is always "this user's latest N" - walk it straight off the index
+        Index("ix_conversations_user_time", user_id, timestamp.desc()),
+        Index(
+            "ix_conversations_context_gin", context,
+            postgresql_using="gin", postgresql_ops={"context": "jsonb_path_ops"}
+        ).ddl_if(dialect="postgresql"),
+    )
+    
     def __repr__(self):
         return f"<Conversation(id={self.id}, intent='{self.intent}', time='{self.timestamp}')>"
 
@@ -236,10 +379,10 @@ class Reminder(Base):
     reminder_time = Column(DateTime, nullable=False, index=True)
     
     # How persistent to be
-    priority = Column(SQLEnum(ReminderPriority), default=ReminderPriority.NORMAL)
+    priority = Column(String(20), default=ReminderPriority.NORMAL.value)  # ReminderPriority value
     
     # Status tracking
-    status = Column(SQLEnum(ReminderStatus), default=ReminderStatus.PENDING, index=True)
+    status = Column(String(20), default=ReminderStatus.PENDING.value)  # ReminderStatus value
     nag_count = Column(Integer, default=0)  # How many times we've nagged
     
     # Snooze support
@@ -249,15 +392,27 @@ class Reminder(Base):
     reminder_message = Column(Text)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utcnow())
     completed_at = Column(DateTime)
     
     # Relationships
     user = relationship("User", back_populates="reminders")
     task = relationship("Task", back_populates="reminders")
     
+    # Indexes and constraints
+    __table_args__ = (
+        _one_of("priority", ReminderPriority, "ck_reminders_priority"),
+        _one_of("status", ReminderStatus, "ck_reminders_status"),
+        # The reminder scheduler asks for pending reminders that are due.
+        # Only open reminders are indexed, so it stays small as history grows.
+        Index(
+            "ix_reminders_due", reminder_time,
+            postgresql_where=status.in_([ReminderStatus.PENDING.value, ReminderStatus.SNOOZED.value])
+        ),
+    )
+    
     def __repr__(self):
-        return f"<Reminder(id={self.id}, time='{self.reminder_time}', priority='{self.priority.value}')>"
+        return f"<Reminder(id={self.id}, time='{self.reminder_time}', priority='{self.priority}')>"
 
 
 # ============================================
@@ -286,11 +441,17 @@ class Idea(Base):
     archived = Column(Boolean, default=False)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utcnow())
     
     # Relationship
     user = relationship("User", back_populates="ideas")
     
+    # Indexes
+    __table_args__ = (
+        # /ideas lists a user's newest ideas first
+        Index("ix_ideas_user_created", user_id, created_at.desc()),
+    )
+    
     def __repr__(self):
         return f"<Idea(id={self.id}, category='{self.category}', archived={self.archived})>"
 
@@ -327,14 +488,24 @@ class Assessment(Base):
     score = Column(Integer)
     
     # Patterns detected
-    patterns = Column(JSON)  # Example: {"procrastination_trigger": "patient_charts"}
+    patterns = Column(JSONData)  # Example: {"procrastination_trigger": "patient_charts"}
     
     # Timestamp
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    created_at = Column(DateTime, server_default=utcnow(), index=True)
     
     # Relationship
     user = relationship("User", back_populates="assessments")
     
+    # Indexes
+    __table_args__ = (
+        # "Latest daily/weekly assessment for this user" reads the first entry
+        Index("ix_assessments_user_type_created", user_id, assessment_type, created_at.desc()),
+        Index(
+            "ix_assessments_patterns_gin", patterns,
+            postgresql_using="gin", postgresql_ops={"patterns": "jsonb_path_ops"}
+        ).ddl_if(dialect="postgresql"),
+    )
+    
     def __repr__(self):
         return f"<Assessment(id={self.id}, type='{self.assessment_type}', score={self.score})>"
 
@@ -362,7 +533,7 @@ class Completion(Base):
     priority = Column(String(20))
     
     # Timing
-    completed_at = Column(DateTime, default=datetime.utcnow, index=True)
+    completed_at = Column(DateTime, server_default=utcnow(), index=True)
     time_taken = Column(Integer)  # Actual minutes spent (if tracked)
     
     # Was it on time?
@@ -370,6 +541,12 @@ class Completion(Base):
     
     # No explicit relationship to preserve data even if task is deleted
     
+    # Indexes
+    __table_args__ = (
+        # Stats count a user's completions over the last N days
+        Index("ix_completions_user_time", user_id, completed_at),
+    )
+    
     def __repr__(self):
         return f"<Completion(id={self.id}, task='{self.task_name}', completed='{self.completed_at}')>"
 
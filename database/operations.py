@@ -10,31 +10,83 @@ No complex queries hidden in other files - everything is here.
 By OkayYouGotMe
 """
 
-from sqlalchemy import create_engine, and_, or_, desc
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import (
+    Row, or_, desc, func, select, insert, update, delete, case, inspect, text,
+    type_coerce, CheckConstraint, Text, exists
+)
+from sqlalchemy.dialects.postgresql import ENUM as PG_ENUM, JSON as PG_JSON, JSONB
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.orm import sessionmaker, Session, load_only, selectinload
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict
+from typing import Iterator, List, Optional, Dict, Tuple
+from cachetools import TTLCache
 import logging
+import threading
 
 from .models import (
     User, Task, Conversation, Reminder, Idea, 
-    Assessment, Completion, Base,
+    Assessment, Completion, Base, utcnow, rank_of, MESSAGE_MAX_LENGTH,
     MotivationStyle, TaskStatus, TaskPriority,
     ReminderPriority, ReminderStatus
 )
-from config.settings import DATABASE_URL, MAX_CONVERSATION_MEMORY
+from config.settings import (
+    MAX_CONVERSATION_MEMORY, CONVERSATION_FLUSH_BATCH, USER_CACHE_SIZE, USER_CACHE_TTL,
+    STATS_CACHE_SIZE, STATS_CACHE_TTL
+)
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-# Create database engine
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+# Shared, pooled database engine (see config/database.py)
+from config.database import engine
 
-# Create scoped session factory for thread-safe sessions
+# Create scoped session factory for thread-safe sessions.
+# expire_on_commit=False: objects stay readable after commit without a
+# refresh SELECT (they're handed back to the bot, outside the session).
 from sqlalchemy.orm import scoped_session
-session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+session_factory = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
 SessionLocal = scoped_session(session_factory)
 
+# Enum columns store values (e.g. "in_progress") and callers pass those
+# values - check them with one dict lookup (unknown values raise KeyError)
+_MOTIVATION_STYLES = {style.value: style for style in MotivationStyle}
+_TASK_STATUSES = {status.value: status for status in TaskStatus}
+_TASK_PRIORITIES = {priority.value: priority for priority in TaskPriority}
+_REMINDER_STATUSES = {status.value: status for status in ReminderStatus}
+_REMINDER_PRIORITIES = {priority.value: priority for priority in ReminderPriority}
+
+# Conversations waiting to be saved in one batch (see flush_conversations)
+_pending_conversations: List[Dict] = []
+_pending_conversations_lock = threading.Lock()
+
+# Users by Telegram chat ID - every message starts with this lookup.
+# Entries are UserDTOs; drop them whenever a user changes.
+_user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+# user_id -> chat ID of the cached entry, so updates by ID can drop it
+_user_cache_keys = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+_user_cache_lock = threading.Lock()
+
+# Per-user read caches: user_id -> {days: completion stats} and
+# user_id -> {assessment type: latest Assessment}. A user's entries are
+# dropped whenever their tasks or assessments change.
+_stats_cache = TTLCache(maxsize=STATS_CACHE_SIZE, ttl=STATS_CACHE_TTL)
+_assessment_cache = TTLCache(maxsize=STATS_CACHE_SIZE, ttl=STATS_CACHE_TTL)
+_stats_cache_lock = threading.Lock()
+
+# last_active times waiting to be written (user_id -> time), so a chatty
+# user doesn't cost a write transaction per message
+_pending_active: Dict[int, datetime] = {}
+_pending_active_lock = threading.Lock()
+
+# Reminder status changes from nagging, waiting to be written in one
+# UPDATE (reminder_id -> {"status": ..., "nag_count": ...})
+_pending_reminder_updates: Dict[int, Dict] = {}
+_pending_reminder_updates_lock = threading.Lock()
+
 
 # ============================================
 # DATABASE INITIALIZATION
@@ -46,9 +98,21 @@ def init_database():
     
     Run this once when setting up the application.
     Safe to run multiple times (won't recreate existing tables).
+    Indexes added after a table was created are created here too.
     """
     try:
         Base.metadata.create_all(bind=engine)
+        
+        # create_all skips tables that exist, so bring older ones up to date
+        _upgrade_json_columns()
+        _upgrade_enum_columns()
+        _upgrade_server_defaults()
+        _upgrade_generated_columns()
+        _upgrade_column_storage()
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
+        
         logger.info("✅ Database initialized successfully")
         return True
     except Exception as e:
@@ -56,6 +120,201 @@ def init_database():
         return False
 
 
+def _upgrade_json_columns():
+    """
+    Convert JSON columns created before the switch to JSONB (PostgreSQL only).
+    
+    Safe to run every startup - columns that are already JSONB are skipped.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            
+            existing = {col["name"]: col["type"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if not isinstance(column.type.dialect_impl(engine.dialect), JSONB):
+                    continue
+                
+                current = existing.get(column.name)
+                if isinstance(current, PG_JSON) and not isinstance(current, JSONB):
+                    conn.execute(text(
+                        f'ALTER TABLE {table.name} ALTER COLUMN "{column.name}" '
+                        f'TYPE jsonb USING "{column.name}"::jsonb'
+                    ))
+                    logger.info(f"✅ Converted {table.name}.{column.name} to JSONB")
+
+
+def _upgrade_enum_columns():
+    """
+    Convert database enum columns to the CHECK-constrained strings (PostgreSQL only).
+    
+    Enum types stored member names ("IN_PROGRESS"); the string columns store
+    values ("in_progress"). Safe to run every startup - once converted,
+    there's nothing left to do.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            
+            enum_columns = [
+                col for col in inspector.get_columns(table.name)
+                if isinstance(col["type"], PG_ENUM)
+            ]
+            if not enum_columns:
+                continue
+            
+            for col in enum_columns:
+                name = col["name"]
+                length = table.columns[name].type.length
+                conn.execute(text(
+                    f'ALTER TABLE {table.name} ALTER COLUMN "{name}" DROP DEFAULT'
+                ))
+                conn.execute(text(
+                    f'ALTER TABLE {table.name} ALTER COLUMN "{name}" '
+                    f'TYPE varchar({length}) USING lower("{name}"::text)'
+                ))
+                conn.execute(text(f'DROP TYPE IF EXISTS {col["type"].name}'))
+                logger.info(f"✅ Converted {table.name}.{name} to a string column")
+            
+            existing = {ck["name"] for ck in inspector.get_check_constraints(table.name)}
+            for constraint in table.constraints:
+                if isinstance(constraint, CheckConstraint) and constraint.name not in existing:
+                    conn.execute(text(
+                        f"ALTER TABLE {table.name} ADD CONSTRAINT {constraint.name} "
+                        f"CHECK ({constraint.sqltext})"
+                    ))
+
+
+def _upgrade_server_defaults():
+    """
+    Add database-side defaults (e.g. created_at) that older tables lack (PostgreSQL only).
+    
+    Safe to run every startup - columns that already have a default are skipped.
+    Generated columns are left to _upgrade_generated_columns.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            
+            existing = {col["name"]: col["default"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                # A Computed column's server_default is the Computed itself, not a default
+                if column.server_default is None or column.computed is not None:
+                    continue
+                
+                if existing.get(column.name) is not None:
+                    continue
+                
+                default = column.server_default.arg.compile(dialect=engine.dialect)
+                conn.execute(text(
+                    f'ALTER TABLE {table.name} ALTER COLUMN "{column.name}" SET DEFAULT {default}'
+                ))
+
+
+def _upgrade_generated_columns():
+    """
+    Add generated columns (e.g. users.hourly_checkins) that older tables lack (PostgreSQL only).
+    
+    Existing rows are filled in by the database as the column is added.
+    Safe to run every startup - columns that already exist are skipped.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.computed is None or column.name in existing:
+                    continue
+                
+                definition = CreateColumn(column).compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {definition}"))
+                logger.info(f"✅ Added generated column {table.name}.{column.name}")
+
+
+def _upgrade_column_storage():
+    """
+    Cap text columns that became String(n) and set their storage (PostgreSQL only).
+    
+    Longer values in existing rows are cut to the new length. Columns ask
+    for a storage mode with info={"storage": "main"}. Safe to run every
+    startup - columns that are already up to date are skipped.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            
+            existing = {col["name"]: col["type"] for col in inspector.get_columns(table.name)}
+            storage = dict(conn.execute(text(
+                "SELECT attname, attstorage FROM pg_attribute "
+                "WHERE attrelid = CAST(:table AS regclass) AND attnum > 0"
+            ), {"table": table.name}).all())
+            
+            for column in table.columns:
+                length = getattr(column.type, "length", None)
+                if length and isinstance(existing.get(column.name), Text):
+                    conn.execute(text(
+                        f'ALTER TABLE {table.name} ALTER COLUMN "{column.name}" '
+                        f'TYPE varchar({length}) USING left("{column.name}", {length})'
+                    ))
+                    logger.info(f"✅ Capped {table.name}.{column.name} at {length} characters")
+                
+                mode = column.info.get("storage")
+                if mode and storage.get(column.name) != mode[0]:
+                    conn.execute(text(
+                        f'ALTER TABLE {table.name} ALTER COLUMN "{column.name}" SET STORAGE {mode.upper()}'
+                    ))
+
+
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """
+    Run a block of work in one session and transaction.
+    
+    Commits when the block finishes, rolls back if it raises, and always
+    hands the connection back to the pool:
+        with session_scope() as db:
+            db.add(thing)
+    
+    Yields:
+        Database session
+    """
+    db = SessionLocal()
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        SessionLocal.remove()
+
+
 def get_db() -> Session:
     """
     Get a database session.
@@ -78,7 +337,68 @@ def get_db() -> Session:
 # USER OPERATIONS
 # ============================================
 
-def create_user(telegram_chat_id: str, name: str = None) -> Optional[User]:
+@dataclass(slots=True)
+class UserDTO:
+    """
+    A user's profile as plain data.
+    
+    Returned by the user lookups instead of a User model, so reading a
+    user is one column SELECT - no refresh, no expunge, and nothing that
+    can raise DetachedInstanceError later.
+    """
+    id: int
+    telegram_chat_id: str
+    name: Optional[str]
+    profession: Optional[str]
+    work_schedule: Optional[str]
+    timezone: Optional[str]
+    motivation_style: Optional[str]  # MotivationStyle value
+    goals: Optional[list]
+    preferences: Optional[dict]
+    onboarding_completed: bool
+    onboarding_step: int
+    created_at: Optional[datetime]
+    last_active: Optional[datetime]
+
+
+# User columns in UserDTO field order
+_USER_COLUMNS = tuple(getattr(User, field.name) for field in fields(UserDTO))
+
+
+def _query_user_dto(db: Session, *criteria) -> Optional[UserDTO]:
+    """
+    Load one user's columns as a UserDTO.
+    
+    Args:
+        db: Database session
+        *criteria: Filter conditions on User
+    
+    Returns:
+        UserDTO or None if not found
+    """
+    row = db.execute(select(*_USER_COLUMNS).where(*criteria)).first()
+    return UserDTO(*row) if row else None
+
+
+def _forget_cached_user(user_id: int = None, telegram_chat_id: str = None):
+    """
+    Drop a user from the lookup cache so the next read hits the database.
+    
+    Args:
+        user_id: User's database ID
+        telegram_chat_id: User's Telegram chat ID
+    """
+    with _user_cache_lock:
+        if telegram_chat_id is not None:
+            _user_cache.pop(telegram_chat_id, None)
+        
+        if user_id is not None:
+            key = _user_cache_keys.pop(user_id, None)
+            if key is not None:
+                _user_cache.pop(key, None)
+
+
+def create_user(telegram_chat_id: str, name: str = None) -> Optional[UserDTO]:
     """
     Create a new user in the database.
     
@@ -87,46 +407,42 @@ def create_user(telegram_chat_id: str, name: str = None) -> Optional[User]:
         name: User's name (optional)
     
     Returns:
-        Created User object, or None if failed
+        Created UserDTO, or None if failed
     """
-    db = SessionLocal()
     try:
-        # Check if user already exists
-        existing = db.query(User).filter(
-            User.telegram_chat_id == telegram_chat_id
-        ).first()
-        
-        if existing:
-            logger.info(f"User {telegram_chat_id} already exists")
-            db.refresh(existing)
-            db.expunge(existing)
-            return existing
-        
-        # Create new user
-        user = User(
-            telegram_chat_id=telegram_chat_id,
-            name=name,
-            onboarding_completed=False,
-            onboarding_step=0
-        )
-        
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-        db.expunge(user)  # Detach from session
-        
-        logger.info(f"✅ Created new user: {telegram_chat_id}")
-        return user
-        
+        with session_scope() as db:
+            # Check if user already exists (one boolean, no row loaded)
+            already_exists = db.scalar(
+                select(exists().where(User.telegram_chat_id == telegram_chat_id))
+            )
+            
+            if not already_exists:
+                # Create new user
+                user = User(
+                    telegram_chat_id=telegram_chat_id,
+                    name=name,
+                    onboarding_completed=False,
+                    onboarding_step=0
+                )
+                
+                db.add(user)
+                db.flush()  # Assigns the ID and column defaults - no refresh needed
+                created = UserDTO(*(getattr(user, field.name) for field in fields(UserDTO)))
+                db.commit()
+                
+                logger.info(f"✅ Created new user: {telegram_chat_id}")
+                return created
+        
+        # Outside the session - the lookup opens its own (or hits the cache)
+        logger.info(f"User {telegram_chat_id} already exists")
+        return get_user_by_telegram_id(telegram_chat_id)
+            
     except Exception as e:
         logger.error(f"❌ Error creating user: {e}")
-        db.rollback()
         return None
-    finally:
-        SessionLocal.remove()
 
 
-def get_user_by_telegram_id(telegram_chat_id: str) -> Optional[User]:
+def get_user_by_telegram_id(telegram_chat_id: str) -> Optional[UserDTO]:
     """
     Get user by their Telegram chat ID.
     
@@ -135,50 +451,156 @@ def get_user_by_telegram_id(telegram_chat_id: str) -> Optional[User]:
     Args:
         telegram_chat_id: User's Telegram chat ID
     
+    Served from an in-memory cache when possible. last_active is
+    recorded in memory and written later by flush_last_active().
+    
     Returns:
-        User object or None if not found
+        UserDTO or None if not found
     """
-    db = SessionLocal()
-    try:
-        user = db.query(User).filter(
-            User.telegram_chat_id == telegram_chat_id
-        ).first()
-        
-        if user:
-            # Update last active time
-            user.last_active = datetime.utcnow()
-            db.commit()
-            db.refresh(user)
-            # Make object usable outside session
-            db.expunge(user)
-        
+    with _user_cache_lock:
+        user = _user_cache.get(telegram_chat_id)
+    if user is not None:
+        _touch_user(user)
         return user
-        
+    
+    try:
+        with session_scope() as db:
+            user = _query_user_dto(db, User.telegram_chat_id == telegram_chat_id)
+            
+            if user:
+                _touch_user(user)
+                with _user_cache_lock:
+                    _user_cache[telegram_chat_id] = user
+                    _user_cache_keys[user.id] = telegram_chat_id
+            
+            return user
+            
     except Exception as e:
         logger.error(f"❌ Error getting user: {e}")
         return None
-    finally:
-        SessionLocal.remove()  # Important for scoped_session
 
 
-def get_user_by_id(user_id: int) -> Optional[User]:
+def _touch_user(user: UserDTO):
+    """
+    Mark a user active now. The database write is batched (flush_last_active).
+    
+    Args:
+        user: The user who just sent something
+    """
+    user.last_active = datetime.utcnow()
+    with _pending_active_lock:
+        _pending_active[user.id] = user.last_active
+
+
+def flush_last_active() -> int:
+    """
+    Write all batched last_active times in a single UPDATE.
+    
+    Called periodically by the bot and once more on shutdown.
+    If the write fails, the times are kept for the next flush.
+    
+    Returns:
+        Number of users updated
+    """
+    with _pending_active_lock:
+        pending = dict(_pending_active)
+        _pending_active.clear()
+    
+    if not pending:
+        return 0
+    
+    try:
+        with session_scope() as db:
+            db.execute(
+                update(User)
+                .where(User.id.in_(pending))
+                .values(last_active=case(pending, value=User.id))
+            )
+            db.commit()
+            return len(pending)
+            
+    except Exception as e:
+        logger.error(f"❌ Error saving last active times: {e}")
+        with _pending_active_lock:
+            for user_id, when in pending.items():
+                _pending_active.setdefault(user_id, when)
+        return 0
+
+
+def get_user_by_id(user_id: int) -> Optional[UserDTO]:
     """
     Get user by their database ID.
     
+    Served from the same cache as get_user_by_telegram_id(); a miss
+    fills it for both lookups.
+    
     Args:
         user_id: User's database ID
     
     Returns:
-        User object or None if not found
+        UserDTO or None if not found
     """
-    db = SessionLocal()
+    with _user_cache_lock:
+        key = _user_cache_keys.get(user_id)
+        cached = _user_cache.get(key) if key is not None else None
+    
+    if cached is not None:
+        return cached
+    
     try:
-        return db.query(User).filter(User.id == user_id).first()
+        with session_scope() as db:
+            user = _query_user_dto(db, User.id == user_id)
+            
+            if user:
+                with _user_cache_lock:
+                    _user_cache[user.telegram_chat_id] = user
+                    _user_cache_keys[user.id] = user.telegram_chat_id
+            
+            return user
     except Exception as e:
         logger.error(f"❌ Error getting user by ID: {e}")
         return None
-    finally:
-        db.close()
+
+
+def get_users_with_preferences(preferences: Dict) -> List[User]:
+    """
+    Get all users whose preferences include the given key/values.
+    
+    Uses JSONB containment (@>) so PostgreSQL can answer it from the
+    preferences GIN index instead of scanning every user.
+    
+    Args:
+        preferences: Preferences to match, e.g. {"hourly_checkins": True}
+    
+    Returns:
+        List of matching User objects
+    """
+    try:
+        with session_scope() as db:
+            return db.scalars(select(User).where(
+                type_coerce(User.preferences, JSONB).contains(preferences)
+            )).all()
+    except Exception as e:
+        logger.error(f"❌ Error finding users by preferences: {e}")
+        return []
+
+
+def get_users_with_hourly_checkins() -> List[User]:
+    """
+    Get all users who turned on hourly check-ins.
+    
+    Filters on the generated hourly_checkins column (and its partial index)
+    rather than looking inside every user's preferences JSON.
+    
+    Returns:
+        List of opted-in User objects
+    """
+    try:
+        with session_scope() as db:
+            return db.scalars(select(User).where(User.hourly_checkins.is_(True))).all()
+    except Exception as e:
+        logger.error(f"❌ Error finding users with hourly check-ins: {e}")
+        return []
 
 
 def update_user_profile(
@@ -209,39 +631,37 @@ def update_user_profile(
     Returns:
         True if successful, False otherwise
     """
-    db = SessionLocal()
     try:
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
-            return False
-        
-        # Update only provided fields
-        if name is not None:
-            user.name = name
-        if profession is not None:
-            user.profession = profession
-        if work_schedule is not None:
-            user.work_schedule = work_schedule
-        if timezone is not None:
-            user.timezone = timezone
-        if motivation_style is not None:
-            # Convert string to enum
-            user.motivation_style = MotivationStyle[motivation_style.upper()]
-        if goals is not None:
-            user.goals = goals
-        if preferences is not None:
-            user.preferences = preferences
-        
-        db.commit()
-        logger.info(f"✅ Updated profile for user {user_id}")
-        return True
-        
+        with session_scope() as db:
+            user = db.get(User, user_id)
+            if not user:
+                return False
+            
+            # Update only provided fields
+            if name is not None:
+                user.name = name
+            if profession is not None:
+                user.profession = profession
+            if work_schedule is not None:
+                user.work_schedule = work_schedule
+            if timezone is not None:
+                user.timezone = timezone
+            if motivation_style is not None:
+                # Validate against the enum, store its value
+                user.motivation_style = _MOTIVATION_STYLES[motivation_style].value
+            if goals is not None:
+                user.goals = goals
+            if preferences is not None:
+                user.preferences = preferences
+            
+            db.commit()
+            _forget_cached_user(user_id)
+            logger.info(f"✅ Updated profile for user {user_id}")
+            return True
+            
     except Exception as e:
         logger.error(f"❌ Error updating user profile: {e}")
-        db.rollback()
         return False
-    finally:
-        db.close()
 
 
 def complete_onboarding(user_id: int) -> bool:
@@ -254,28 +674,73 @@ def complete_onboarding(user_id: int) -> bool:
     Returns:
         True if successful
     """
-    db = SessionLocal()
     try:
-        user = db.query(User).filter(User.id == user_id).first()
-        if user:
-            user.onboarding_completed = True
-            user.onboarding_step = 0
+        with session_scope() as db:
+            user = db.get(User, user_id)
+            if user:
+                user.onboarding_completed = True
+                user.onboarding_step = 0
+                db.commit()
+                _forget_cached_user(user_id)
+                logger.info(f"✅ Onboarding completed for user {user_id}")
+                return True
+            return False
+    except Exception as e:
+        logger.error(f"❌ Error completing onboarding: {e}")
+        return False
+
+
+def update_user_profile_and_complete(user_id: int, **fields) -> bool:
+    """
+    Save the last onboarding answer and finish onboarding together.
+    
+    Same as update_user_profile() followed by complete_onboarding(),
+    but as a single UPDATE and commit.
+    
+    Args:
+        user_id: User's database ID
+        **fields: Profile fields, as accepted by update_user_profile()
+    
+    Returns:
+        True if successful
+    """
+    try:
+        with session_scope() as db:
+            values = {key: value for key, value in fields.items() if value is not None}
+            
+            if 'motivation_style' in values:
+                values['motivation_style'] = _MOTIVATION_STYLES[values['motivation_style']].value
+            
+            result = db.execute(
+                update(User)
+                .where(User.id == user_id)
+                .values(**values, onboarding_completed=True, onboarding_step=0)
+            )
+            
             db.commit()
+            if result.rowcount != 1:
+                return False
+            
+            _forget_cached_user(user_id)
             logger.info(f"✅ Onboarding completed for user {user_id}")
             return True
-        return False
+            
     except Exception as e:
         logger.error(f"❌ Error completing onboarding: {e}")
-        db.rollback()
         return False
-    finally:
-        db.close()
 
 
 # ============================================
 # TASK OPERATIONS
 # ============================================
 
+# What task lists show - all covered by ix_tasks_user_status_covering
+_TASK_LIST_COLUMNS = (Task.id, Task.user_id, Task.task_name, Task.status, Task.priority, Task.due_date)
+
+# Priorities are stored as strings, so sort them by rank (urgent = highest).
+# Matches ix_tasks_user_priority_due, which serves this order.
+_PRIORITY_RANK = rank_of(Task.priority, TaskPriority)
+
 def create_task(
     user_id: int,
     task_name: str,
@@ -302,39 +767,37 @@ def create_task(
     Returns:
         Created Task object or None if failed
     """
-    db = SessionLocal()
     try:
-        task = Task(
-            user_id=user_id,
-            task_name=task_name,
-            description=description,
-            due_date=due_date,
-            priority=TaskPriority[priority.upper()],
-            category=category,
-            parent_task_id=parent_task_id,
-            estimated_time=estimated_time,
-            status=TaskStatus.PENDING
-        )
-        
-        db.add(task)
-        db.commit()
-        db.refresh(task)
-        
-        logger.info(f"✅ Created task '{task_name}' for user {user_id}")
-        return task
-        
+        with session_scope() as db:
+            task = Task(
+                user_id=user_id,
+                task_name=task_name,
+                description=description,
+                due_date=due_date,
+                priority=_TASK_PRIORITIES[priority].value,
+                category=category,
+                parent_task_id=parent_task_id,
+                estimated_time=estimated_time,
+                status=TaskStatus.PENDING.value
+            )
+            
+            db.add(task)
+            db.commit()
+            _forget_cached_stats(user_id)
+            
+            logger.info(f"✅ Created task '{task_name}' for user {user_id}")
+            return task
+            
     except Exception as e:
         logger.error(f"❌ Error creating task: {e}")
-        db.rollback()
         return None
-    finally:
-        db.close()
 
 
 def get_user_tasks(
     user_id: int,
     status: str = None,
-    limit: int = None
+    limit: int = None,
+    columns: tuple = None
 ) -> List[Task]:
     """
     Get tasks for a user.
@@ -343,93 +806,142 @@ def get_user_tasks(
         user_id: User's database ID
         status: Filter by status (pending, completed, etc.)
         limit: Maximum number of tasks to return
+        columns: Only load these Task columns (others can't be read later)
     
     Returns:
         List of Task objects
     """
-    db = SessionLocal()
     try:
-        query = db.query(Task).filter(Task.user_id == user_id)
-        
-        if status:
-            query = query.filter(Task.status == TaskStatus[status.upper()])
-        
-        # Order by priority (urgent first) then due date
-        query = query.order_by(
-            Task.priority.desc(),
-            Task.due_date.asc().nullslast()
-        )
-        
-        if limit:
-            query = query.limit(limit)
-        
-        return query.all()
-        
+        with session_scope() as db:
+            query = select(Task).where(Task.user_id == user_id)
+            
+            if columns:
+                query = query.options(load_only(*columns))
+            
+            if status:
+                query = query.where(Task.status == _TASK_STATUSES[status].value)
+            
+            # Order by priority (urgent first) then due date
+            query = query.order_by(
+                _PRIORITY_RANK.desc(),
+                Task.due_date.asc().nullslast()
+            )
+            
+            if limit:
+                query = query.limit(limit)
+            
+            return db.scalars(query).all()
+            
     except Exception as e:
         logger.error(f"❌ Error getting tasks: {e}")
         return []
-    finally:
-        db.close()
 
 
 def get_pending_tasks(user_id: int) -> List[Task]:
     """
     Get all pending tasks for a user.
     
+    Only the columns task lists use are loaded (id, task_name, status,
+    priority, due_date).
+    
     Args:
         user_id: User's database ID
     
     Returns:
         List of pending Task objects
     """
-    return get_user_tasks(user_id, status="pending")
+    return get_user_tasks(user_id, status="pending", columns=_TASK_LIST_COLUMNS)
+
+
+def get_task_tree(root_task_id: int) -> List[Task]:
+    """
+    Get a task together with all of its subtasks, at any depth.
+    
+    Uses a recursive CTE, so the whole subtree comes back in one query
+    instead of one query per level.
+    
+    Args:
+        root_task_id: ID of the task at the top of the tree
+    
+    Returns:
+        List of Task objects (root first, then in ID order), empty if not found
+    """
+    try:
+        with session_scope() as db:
+            tree = (
+                select(Task.id, Task.parent_task_id)
+                .where(Task.id == root_task_id)
+                .cte("subtree", recursive=True)
+            )
+            tree = tree.union_all(
+                select(Task.id, Task.parent_task_id)
+                .where(Task.parent_task_id == tree.c.id)
+            )
+            
+            return db.scalars(
+                select(Task).where(Task.id.in_(select(tree.c.id))).order_by(
+                    (Task.id != root_task_id), Task.id
+                )
+            ).all()
+            
+    except Exception as e:
+        logger.error(f"❌ Error getting task tree: {e}")
+        return []
 
 
-def mark_task_complete(task_id: int) -> bool:
+def mark_task_complete(task_id: int) -> Tuple[bool, int]:
     """
     Mark a task as completed.
     
-    Also creates a Completion record for statistics.
+    Also creates a Completion record for statistics (INSERT ... SELECT
+    from the task row), and counts the user's remaining pending tasks in
+    the same transaction.
     
     Args:
         task_id: Task's database ID
     
     Returns:
-        True if successful
+        (True if successful, number of pending tasks left)
     """
-    db = SessionLocal()
     try:
-        task = db.query(Task).filter(Task.id == task_id).first()
-        if not task:
-            return False
-        
-        # Update task status
-        task.status = TaskStatus.COMPLETED
-        task.completed_at = datetime.utcnow()
-        
-        # Create completion record for stats
-        completion = Completion(
-            user_id=task.user_id,
-            task_id=task.id,
-            task_name=task.task_name,
-            category=task.category,
-            priority=task.priority.value,
-            completed_at=datetime.utcnow(),
-            was_on_time=task.due_date is None or datetime.utcnow() <= task.due_date
-        )
-        
-        db.add(completion)
-        db.commit()
-        
-        logger.info(f"✅ Task {task_id} marked complete")
-        return True
-        
+        with session_scope() as db:
+            # Update task status (nothing is loaded into Python)
+            user_id = db.execute(
+                update(Task)
+                .where(Task.id == task_id)
+                .values(status=TaskStatus.COMPLETED.value, completed_at=utcnow())
+                .returning(Task.user_id)
+            ).scalar()
+            if user_id is None:
+                return False, 0
+            
+            # Create completion record for stats, snapshotted from the task row
+            db.execute(insert(Completion).from_select(
+                ["user_id", "task_id", "task_name", "category", "priority",
+                 "completed_at", "was_on_time"],
+                select(
+                    Task.user_id, Task.id, Task.task_name, Task.category, Task.priority,
+                    Task.completed_at,
+                    or_(Task.due_date.is_(None), Task.due_date >= Task.completed_at)
+                ).where(Task.id == task_id)
+            ))
+            
+            remaining = db.scalar(
+                select(func.count(Task.id)).where(
+                    Task.user_id == user_id,
+                    Task.status == TaskStatus.PENDING.value
+                )
+            )
+            
+            db.commit()
+            _forget_cached_stats(user_id)
+            
+            logger.info(f"✅ Task {task_id} marked complete")
+            return True, remaining
+            
     except Exception as e:
         logger.error(f"❌ Error completing task: {e}")
-        db.rollback()
-        return False
-    finally:
-        db.close()
+        return False, 0
 
 
 def update_task_status(task_id: int, status: str) -> bool:
@@ -443,27 +955,25 @@ def update_task_status(task_id: int, status: str) -> bool:
     Returns:
         True if successful
     """
-    db = SessionLocal()
     try:
-        task = db.query(Task).filter(Task.id == task_id).first()
-        if not task:
-            return False
-        
-        task.status = TaskStatus[status.upper()]
-        
-        if status == "completed":
-            task.completed_at = datetime.utcnow()
-        
-        db.commit()
-        logger.info(f"✅ Task {task_id} status updated to {status}")
-        return True
-        
+        with session_scope() as db:
+            task = db.get(Task, task_id)
+            if not task:
+                return False
+            
+            task.status = _TASK_STATUSES[status].value
+            
+            if status == "completed":
+                task.completed_at = utcnow()
+            
+            db.commit()
+            _forget_cached_stats(task.user_id)
+            logger.info(f"✅ Task {task_id} status updated to {status}")
+            return True
+            
     except Exception as e:
         logger.error(f"❌ Error updating task status: {e}")
-        db.rollback()
         return False
-    finally:
-        db.close()
 
 
 # ============================================
@@ -492,77 +1002,166 @@ def save_conversation(
     Returns:
         Created Conversation object or None
     """
-    db = SessionLocal()
     try:
-        # Create new conversation entry
-        conversation = Conversation(
-            user_id=user_id,
-            user_message=user_message,
-            ai_response=ai_response,
-            intent=intent,
-            context=context or {}
-        )
-        
-        db.add(conversation)
-        
-        # Clean up old conversations (keep only last MAX_CONVERSATION_MEMORY)
-        old_conversations = db.query(Conversation).filter(
-            Conversation.user_id == user_id
-        ).order_by(desc(Conversation.timestamp)).offset(MAX_CONVERSATION_MEMORY).all()
-        
-        for old_conv in old_conversations:
-            db.delete(old_conv)
-        
-        db.commit()
-        db.refresh(conversation)
-        
-        return conversation
-        
+        with session_scope() as db:
+            # Create new conversation entry
+            conversation = Conversation(
+                user_id=user_id,
+                user_message=user_message[:MESSAGE_MAX_LENGTH],
+                ai_response=ai_response[:MESSAGE_MAX_LENGTH],
+                intent=intent,
+                context=context or {}
+            )
+            
+            db.add(conversation)
+            db.flush()
+            
+            _prune_conversations(db, user_id)
+            db.commit()
+            
+            return conversation
+            
     except Exception as e:
         logger.error(f"❌ Error saving conversation: {e}")
-        db.rollback()
         return None
-    finally:
-        db.close()
 
 
-def get_conversation_history(user_id: int, limit: int = None) -> List[Conversation]:
+def _prune_conversations(db: Session, user_id: int):
+    """
+    Delete a user's conversations beyond the last MAX_CONVERSATION_MEMORY.
+    
+    One DELETE, without loading the rows.
+    
+    Args:
+        db: Database session
+        user_id: User's database ID
+    """
+    old_ids = select(Conversation.id).where(
+        Conversation.user_id == user_id
+    ).order_by(desc(Conversation.timestamp)).offset(MAX_CONVERSATION_MEMORY).subquery()
+    
+    db.execute(
+        delete(Conversation)
+        .where(Conversation.id.in_(select(old_ids.c.id)))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def queue_conversation(
+    user_id: int,
+    user_message: str,
+    ai_response: str,
+    intent: str = None,
+    context: Dict = None
+):
+    """
+    Queue a conversation exchange to be saved by flush_conversations().
+    
+    Returns immediately - the bot flushes the queue in batches, so a busy
+    minute costs a few multi-row INSERTs instead of one per message.
+    
+    Args:
+        user_id: User's database ID
+        user_message: What the user said
+        ai_response: What the AI responded
+        intent: Detected intent (add_task, complete_task, etc.)
+        context: Additional context data
+    """
+    row = {
+        "user_id": user_id,
+        "user_message": user_message[:MESSAGE_MAX_LENGTH],
+        "ai_response": ai_response[:MESSAGE_MAX_LENGTH],
+        "intent": intent,
+        "context": context or {},
+        "timestamp": datetime.utcnow()  # Time of the exchange, not of the flush
+    }
+    with _pending_conversations_lock:
+        _pending_conversations.append(row)
+
+
+def flush_conversations(max_rows: int = CONVERSATION_FLUSH_BATCH) -> int:
+    """
+    Save queued conversations in one multi-row INSERT.
+    
+    Old conversations are pruned once per user in the batch rather than
+    once per message. If the write fails, the rows are queued again.
+    
+    Args:
+        max_rows: Most conversations to write in this batch
+    
+    Returns:
+        Number of conversations saved
+    """
+    with _pending_conversations_lock:
+        batch = _pending_conversations[:max_rows]
+        del _pending_conversations[:max_rows]
+    
+    if not batch:
+        return 0
+    
+    try:
+        with session_scope() as db:
+            db.execute(insert(Conversation), batch)
+            for user_id in {row["user_id"] for row in batch}:
+                _prune_conversations(db, user_id)
+            db.commit()
+            return len(batch)
+            
+    except Exception as e:
+        logger.error(f"❌ Error saving conversations: {e}")
+        with _pending_conversations_lock:
+            _pending_conversations[:0] = batch
+        return 0
+
+
+def get_conversation_history(user_id: int, limit: int = None) -> List[Row]:
     """
     Get recent conversation history for a user.
     
-    Used for providing context to AI.
+    Used for providing context to AI. Returns plain rows rather than
+    Conversation objects - the history is only read, never changed.
     
     Args:
         user_id: User's database ID
         limit: Max conversations to return (default: MAX_CONVERSATION_MEMORY)
     
     Returns:
-        List of Conversation objects (newest first)
+        Rows with user_message, ai_response, intent, timestamp (newest first)
     """
-    db = SessionLocal()
     try:
-        query = db.query(Conversation).filter(
-            Conversation.user_id == user_id
-        ).order_by(desc(Conversation.timestamp))
-        
-        if limit:
-            query = query.limit(limit)
-        else:
-            query = query.limit(MAX_CONVERSATION_MEMORY)
-        
-        return query.all()
-        
+        with session_scope() as db:
+            return db.execute(
+                select(
+                    Conversation.user_message, Conversation.ai_response,
+                    Conversation.intent, Conversation.timestamp
+                )
+                .where(Conversation.user_id == user_id)
+                .order_by(desc(Conversation.timestamp))
+                .limit(limit or MAX_CONVERSATION_MEMORY)
+            ).all()
+            
     except Exception as e:
         logger.error(f"❌ Error getting conversation history: {e}")
         return []
-    finally:
-        db.close()
 
 
 # ============================================
 # REMINDER OPERATIONS
 # ============================================
 
+def _reminder_priority(priority: Optional[str]) -> str:
+    """
+    Stored value for a reminder priority; unknown or missing means normal.
+    
+    Args:
+        priority: optional, normal, important, critical
+    
+    Returns:
+        ReminderPriority value
+    """
+    return _REMINDER_PRIORITIES.get(priority, ReminderPriority.NORMAL).value
+
+
 def create_reminder(
     user_id: int,
     reminder_time: datetime,
@@ -581,61 +1180,153 @@ def create_reminder(
         task_id: Associated task ID (optional)
     
     Returns:
-        Created Reminder object or None
+        Created Reminder object or None. Every column is filled in - the
+        ID and server defaults (created_at) come back with the INSERT
+        (RETURNING), so there's no refresh() round trip
     """
-    db = SessionLocal()
     try:
-        reminder = Reminder(
-            user_id=user_id,
-            task_id=task_id,
-            reminder_time=reminder_time,
-            reminder_message=reminder_message,
-            priority=ReminderPriority[priority.upper()],
-            status=ReminderStatus.PENDING
-        )
-        
-        db.add(reminder)
-        db.commit()
-        db.refresh(reminder)
-        
-        logger.info(f"✅ Reminder created for user {user_id} at {reminder_time}")
-        return reminder
-        
+        with session_scope() as db:
+            reminder = Reminder(
+                user_id=user_id,
+                task_id=task_id,
+                reminder_time=reminder_time,
+                reminder_message=reminder_message,
+                priority=_reminder_priority(priority),
+                status=ReminderStatus.PENDING.value
+            )
+            
+            db.add(reminder)
+            db.commit()
+            
+            logger.info(f"✅ Reminder created for user {user_id} at {reminder_time}")
+            return reminder
+            
     except Exception as e:
         logger.error(f"❌ Error creating reminder: {e}")
-        db.rollback()
         return None
-    finally:
-        db.close()
 
 
-def get_pending_reminders() -> List[Reminder]:
+def create_reminders_bulk(reminders: List[Dict]) -> List[int]:
     """
-    Get all pending reminders that are due now.
+    Create many reminders in one transaction.
     
-    Used by the scheduler to send reminders.
+    One executemany INSERT ... RETURNING (batched into multi-row
+    statements by SQLAlchemy) instead of a commit per reminder.
+    
+    Args:
+        reminders: Dicts with the create_reminder() arguments
+            (user_id, reminder_time, reminder_message, optional
+            priority and task_id)
     
     Returns:
-        List of due Reminder objects
+        IDs of the created reminders, in the same order (empty if failed)
     """
-    db = SessionLocal()
+    if not reminders:
+        return []
+    
+    rows = [
+        {
+            "user_id": reminder["user_id"],
+            "task_id": reminder.get("task_id"),
+            "reminder_time": reminder["reminder_time"],
+            "reminder_message": reminder["reminder_message"],
+            "priority": _reminder_priority(reminder.get("priority")),
+            "status": ReminderStatus.PENDING.value
+        }
+        for reminder in reminders
+    ]
+    
     try:
-        now = datetime.utcnow()
-        
-        reminders = db.query(Reminder).filter(
-            and_(
-                Reminder.status == ReminderStatus.PENDING,
-                Reminder.reminder_time <= now
+        with session_scope() as db:
+            ids = db.scalars(
+                insert(Reminder).returning(Reminder.id, sort_by_parameter_order=True),
+                rows
+            ).all()
+            db.commit()
+            
+            logger.info(f"✅ Created {len(ids)} reminders")
+            return ids
+            
+    except Exception as e:
+        logger.error(f"❌ Error creating reminders: {e}")
+        return []
+
+
+# What sending a reminder uses - everything else stays in the database
+_REMINDER_SEND_COLUMNS = (
+    Reminder.id, Reminder.user_id, Reminder.task_id, Reminder.reminder_time,
+    Reminder.reminder_message, Reminder.priority, Reminder.nag_count
+)
+
+
+def get_next_reminder_time() -> Optional[datetime]:
+    """
+    When the next pending reminder is due.
+    
+    Lets the scheduler sleep until then instead of polling. Answered from
+    the front of ix_reminders_due.
+    
+    Returns:
+        Earliest reminder_time among pending reminders, or None if there are none
+    """
+    try:
+        with session_scope() as db:
+            return db.scalar(
+                select(func.min(Reminder.reminder_time))
+                .where(Reminder.status == ReminderStatus.PENDING.value)
             )
-        ).all()
-        
-        return reminders
-        
     except Exception as e:
-        logger.error(f"❌ Error getting pending reminders: {e}")
+        logger.error(f"❌ Error getting next reminder time: {e}")
+        return None
+
+
+def claim_due_reminders() -> List[Reminder]:
+    """
+    Take all pending reminders that are due now, marking them as sent.
+    
+    Used by the scheduler to send reminders. The due reminders are
+    switched to "sent" (nag_count=1) by one UPDATE ... RETURNING before
+    they're loaded by ID, so a reminder is only ever claimed once, even
+    if two checks overlap, and sending needs no status write of its own.
+    
+    Only the columns sending needs are loaded (see _REMINDER_SEND_COLUMNS).
+    Each reminder's .user comes preloaded (id, telegram_chat_id, name) in
+    one extra query for all of them, so sending doesn't look users up one
+    by one.
+    
+    Returns:
+        List of claimed Reminder objects (.user preloaded)
+    """
+    try:
+        with session_scope() as db:
+            now = datetime.utcnow()
+            
+            ids = db.scalars(
+                update(Reminder)
+                .where(
+                    Reminder.status == ReminderStatus.PENDING.value,
+                    Reminder.reminder_time <= now
+                )
+                .values(status=ReminderStatus.SENT.value, nag_count=1)
+                .returning(Reminder.id)
+            ).all()
+            
+            if not ids:
+                return []
+            
+            reminders = db.scalars(
+                select(Reminder).options(
+                    load_only(*_REMINDER_SEND_COLUMNS),
+                    selectinload(Reminder.user).load_only(User.id, User.telegram_chat_id, User.name)
+                ).where(Reminder.id.in_(ids))
+            ).all()
+            
+            db.commit()
+            return reminders
+            
+    except Exception as e:
+        logger.error(f"❌ Error claiming due reminders: {e}")
         return []
-    finally:
-        db.close()
 
 
 def update_reminder_status(
@@ -654,29 +1345,99 @@ def update_reminder_status(
     Returns:
         True if successful
     """
-    db = SessionLocal()
     try:
-        reminder = db.query(Reminder).filter(Reminder.id == reminder_id).first()
-        if not reminder:
-            return False
-        
-        reminder.status = ReminderStatus[status.upper()]
-        
-        if nag_count is not None:
-            reminder.nag_count = nag_count
-        
-        if status == "completed":
-            reminder.completed_at = datetime.utcnow()
-        
-        db.commit()
-        return True
-        
+        with session_scope() as db:
+            values = {"status": _REMINDER_STATUSES[status].value}
+            
+            if nag_count is not None:
+                values["nag_count"] = nag_count
+            
+            if status == "completed":
+                values["completed_at"] = utcnow()
+            
+            # One UPDATE - no SELECT first; rowcount says if it existed
+            result = db.execute(
+                update(Reminder).where(Reminder.id == reminder_id).values(**values)
+            )
+            
+            db.commit()
+            return result.rowcount == 1
+            
     except Exception as e:
         logger.error(f"❌ Error updating reminder: {e}")
-        db.rollback()
         return False
-    finally:
-        db.close()
+
+
+def queue_reminder_status(reminder_id: int, status: str, nag_count: int = None):
+    """
+    Batch a reminder status change. Written by flush_reminder_updates().
+    
+    For the nagging writes ("sent" with a new nag count, "cancelled" when
+    missed). They're only applied while the reminder is still "sent", so
+    a reply the user made in the meantime is never overwritten.
+    
+    Args:
+        reminder_id: Reminder's database ID
+        status: New status (sent or cancelled)
+        nag_count: Updated nag count (optional)
+    """
+    values = {"status": _REMINDER_STATUSES[status].value}
+    if nag_count is not None:
+        values["nag_count"] = nag_count
+    
+    with _pending_reminder_updates_lock:
+        _pending_reminder_updates.setdefault(reminder_id, {}).update(values)
+
+
+def flush_reminder_updates() -> int:
+    """
+    Write all batched reminder status changes in a single UPDATE.
+    
+    Called periodically by the bot and once more on shutdown.
+    If the write fails, the changes are kept for the next flush.
+    
+    Returns:
+        Number of reminders in the batch
+    """
+    with _pending_reminder_updates_lock:
+        pending = dict(_pending_reminder_updates)
+        _pending_reminder_updates.clear()
+    
+    if not pending:
+        return 0
+    
+    statuses = {reminder_id: values["status"] for reminder_id, values in pending.items()}
+    nag_counts = {
+        reminder_id: values["nag_count"]
+        for reminder_id, values in pending.items() if "nag_count" in values
+    }
+    
+    try:
+        with session_scope() as db:
+            values = {"status": case(statuses, value=Reminder.id)}
+            if nag_counts:
+                values["nag_count"] = case(nag_counts, value=Reminder.id, else_=Reminder.nag_count)
+            
+            db.execute(
+                update(Reminder)
+                .where(
+                    Reminder.id.in_(pending),
+                    Reminder.status == ReminderStatus.SENT.value
+                )
+                .values(**values)
+            )
+            db.commit()
+            return len(pending)
+            
+    except Exception as e:
+        logger.error(f"❌ Error saving reminder updates: {e}")
+        with _pending_reminder_updates_lock:
+            for reminder_id, values in pending.items():
+                # Anything queued since takes precedence
+                _pending_reminder_updates[reminder_id] = {
+                    **values, **_pending_reminder_updates.get(reminder_id, {})
+                }
+        return 0
 
 
 # ============================================
@@ -699,67 +1460,166 @@ def create_idea(
         notes: Additional notes
     
     Returns:
-        Created Idea object or None
+        Created Idea object (fully loaded, as in create_reminder) or None
     """
-    db = SessionLocal()
     try:
-        idea = Idea(
-            user_id=user_id,
-            idea_text=idea_text,
-            category=category,
-            notes=notes
-        )
-        
-        db.add(idea)
-        db.commit()
-        db.refresh(idea)
-        
-        logger.info(f"✅ Idea saved for user {user_id}")
-        return idea
-        
+        with session_scope() as db:
+            idea = Idea(
+                user_id=user_id,
+                idea_text=idea_text,
+                category=category,
+                notes=notes
+            )
+            
+            db.add(idea)
+            db.commit()
+            
+            logger.info(f"✅ Idea saved for user {user_id}")
+            return idea
+            
     except Exception as e:
         logger.error(f"❌ Error creating idea: {e}")
-        db.rollback()
         return None
-    finally:
-        db.close()
 
 
-def get_user_ideas(user_id: int, archived: bool = False) -> List[Idea]:
+def create_ideas_bulk(ideas: List[Dict]) -> List[int]:
+    """
+    Save many ideas in one transaction (e.g. an import).
+    
+    Args:
+        ideas: Dicts with the create_idea() arguments
+            (user_id, idea_text, optional category and notes)
+    
+    Returns:
+        IDs of the saved ideas, in the same order (empty if failed)
+    """
+    if not ideas:
+        return []
+    
+    rows = [
+        {
+            "user_id": idea["user_id"],
+            "idea_text": idea["idea_text"],
+            "category": idea.get("category", "General"),
+            "notes": idea.get("notes")
+        }
+        for idea in ideas
+    ]
+    
+    try:
+        with session_scope() as db:
+            ids = db.scalars(
+                insert(Idea).returning(Idea.id, sort_by_parameter_order=True),
+                rows
+            ).all()
+            db.commit()
+            
+            logger.info(f"✅ Saved {len(ids)} ideas")
+            return ids
+            
+    except Exception as e:
+        logger.error(f"❌ Error creating ideas: {e}")
+        return []
+
+
+def get_user_ideas(
+    user_id: int,
+    archived: bool = False,
+    limit: int = None,
+    offset: int = 0
+) -> List[Idea]:
     """
     Get all ideas for a user.
     
+    Pass a limit (and offset) to read one page at a time instead of a
+    user's whole history.
+    
     Args:
         user_id: User's database ID
         archived: Include archived ideas? (default: False)
+        limit: Maximum number of ideas to return (newest first)
+        offset: Ideas to skip before the page starts (with limit)
     
     Returns:
-        List of Idea objects
+        List of Idea objects (newest first)
     """
-    db = SessionLocal()
     try:
-        query = db.query(Idea).filter(Idea.user_id == user_id)
-        
-        if not archived:
-            query = query.filter(Idea.archived == False)
-        
-        return query.order_by(desc(Idea.created_at)).all()
-        
+        with session_scope() as db:
+            query = select(Idea).where(Idea.user_id == user_id)
+            
+            if not archived:
+                query = query.where(Idea.archived == False)
+            
+            query = query.order_by(desc(Idea.created_at))
+            
+            if limit:
+                query = query.limit(limit).offset(offset)
+            
+            return db.scalars(query).all()
+            
     except Exception as e:
         logger.error(f"❌ Error getting ideas: {e}")
         return []
-    finally:
-        db.close()
+
+
+def get_recent_ideas(user_id: int, limit: int = 10) -> Tuple[List[Row], int]:
+    """
+    Get a user's newest ideas plus how many they have in total.
+    
+    One query: the database trims the list and counts the rest
+    (COUNT(*) OVER ()), so heavy users don't ship every idea over the wire.
+    Only the displayed columns are read, as plain rows.
+    
+    Args:
+        user_id: User's database ID
+        limit: Maximum number of ideas to return
+    
+    Returns:
+        (Rows with id, idea_text, category, created_at; total number of active ideas)
+    """
+    try:
+        with session_scope() as db:
+            rows = db.execute(
+                select(
+                    Idea.id, Idea.idea_text, Idea.category, Idea.created_at,
+                    func.count().over().label("total")
+                ).where(
+                    Idea.user_id == user_id,
+                    Idea.archived == False
+                ).order_by(desc(Idea.created_at)).limit(limit)
+            ).all()
+            
+            total = rows[0].total if rows else 0
+            
+            return rows, total
+            
+    except Exception as e:
+        logger.error(f"❌ Error getting ideas: {e}")
+        return [], 0
 
 
 # ============================================
 # STATISTICS OPERATIONS
 # ============================================
 
+def _forget_cached_stats(user_id: int):
+    """
+    Drop a user's cached completion stats and latest assessments.
+    
+    Args:
+        user_id: User's database ID
+    """
+    with _stats_cache_lock:
+        _stats_cache.pop(user_id, None)
+        _assessment_cache.pop(user_id, None)
+
+
 def get_completion_stats(user_id: int, days: int = 30) -> Dict:
     """
     Get completion statistics for a user.
     
+    Served from an in-memory cache when possible (see _forget_cached_stats).
+    
     Args:
         user_id: User's database ID
         days: Number of days to look back (default: 30)
@@ -767,50 +1627,141 @@ def get_completion_stats(user_id: int, days: int = 30) -> Dict:
     Returns:
         Dict with stats (completed_count, completion_rate, etc.)
     """
-    db = SessionLocal()
+    with _stats_cache_lock:
+        cached = _stats_cache.get(user_id, {}).get(days)
+    if cached is not None:
+        return cached
+    
     try:
-        since = datetime.utcnow() - timedelta(days=days)
-        
-        # Get completions in period
-        completions = db.query(Completion).filter(
-            and_(
-                Completion.user_id == user_id,
-                Completion.completed_at >= since
-            )
-        ).all()
-        
-        # Get tasks created in period (for completion rate)
-        tasks_created = db.query(Task).filter(
-            and_(
+        with session_scope() as db:
+            since = datetime.utcnow() - timedelta(days=days)
+            
+            # Tasks created in period (for completion rate)
+            created_in_period = select(func.count()).select_from(Task).where(
                 Task.user_id == user_id,
                 Task.created_at >= since
-            )
-        ).count()
-        
-        # Calculate stats
-        completed_count = len(completions)
-        on_time_count = sum(1 for c in completions if c.was_on_time)
-        
-        completion_rate = 0
-        if tasks_created > 0:
-            completion_rate = int((completed_count / tasks_created) * 100)
-        
-        on_time_rate = 0
-        if completed_count > 0:
-            on_time_rate = int((on_time_count / completed_count) * 100)
-        
+            ).scalar_subquery()
+            
+            # Completions in period - counted by the database, one row back
+            completed_count, on_time_count, tasks_created = db.execute(
+                select(
+                    func.count(),
+                    func.count().filter(Completion.was_on_time == True),
+                    created_in_period
+                ).where(
+                    Completion.user_id == user_id,
+                    Completion.completed_at >= since
+                )
+            ).one()
+            
+            completion_rate = 0
+            if tasks_created > 0:
+                completion_rate = int((completed_count / tasks_created) * 100)
+            
+            on_time_rate = 0
+            if completed_count > 0:
+                on_time_rate = int((on_time_count / completed_count) * 100)
+            
+            stats = {
+                'completed_count': completed_count,
+                'tasks_created': tasks_created,
+                'completion_rate': completion_rate,
+                'on_time_count': on_time_count,
+                'on_time_rate': on_time_rate,
+                'period_days': days
+            }
+        
+        with _stats_cache_lock:
+            _stats_cache.setdefault(user_id, {})[days] = stats
+        return stats
+            
+    except Exception as e:
+        logger.error(f"❌ Error getting stats: {e}")
         return {
-            'completed_count': completed_count,
-            'tasks_created': tasks_created,
-            'completion_rate': completion_rate,
-            'on_time_count': on_time_count,
-            'on_time_rate': on_time_rate,
+            'completed_count': 0,
+            'tasks_created': 0,
+            'completion_rate': 0,
+            'on_time_count': 0,
+            'on_time_rate': 0,
             'period_days': days
         }
-        
+
+
+def get_user_dashboard(user_id: int, days: int = 30) -> Dict:
+    """
+    Get pending tasks, completion stats and idea count in one query.
+    
+    Same numbers as get_completion_stats + get_pending_tasks +
+    get_user_ideas, but as a single round trip to the database.
+    
+    Args:
+        user_id: User's database ID
+        days: Number of days to look back for stats (default: 30)
+    
+    Returns:
+        Dict with pending_count, ideas_count and the completion stats
+    """
+    try:
+        with session_scope() as db:
+            since = datetime.utcnow() - timedelta(days=days)
+            
+            pending_count = select(func.count()).select_from(Task).where(
+                Task.user_id == user_id,
+                Task.status == TaskStatus.PENDING.value
+            ).scalar_subquery()
+            
+            tasks_created = select(func.count()).select_from(Task).where(
+                Task.user_id == user_id,
+                Task.created_at >= since
+            ).scalar_subquery()
+            
+            completed_count = select(func.count()).select_from(Completion).where(
+                Completion.user_id == user_id,
+                Completion.completed_at >= since
+            ).scalar_subquery()
+            
+            on_time_count = select(
+                func.count().filter(Completion.was_on_time == True)
+            ).select_from(Completion).where(
+                Completion.user_id == user_id,
+                Completion.completed_at >= since
+            ).scalar_subquery()
+            
+            ideas_count = select(func.count()).select_from(Idea).where(
+                Idea.user_id == user_id,
+                Idea.archived == False
+            ).scalar_subquery()
+            
+            row = db.execute(select(
+                pending_count, tasks_created, completed_count, on_time_count, ideas_count
+            )).one()
+            
+            pending, created, completed, on_time, ideas = row
+            
+            completion_rate = 0
+            if created > 0:
+                completion_rate = int((completed / created) * 100)
+            
+            on_time_rate = 0
+            if completed > 0:
+                on_time_rate = int((on_time / completed) * 100)
+            
+            return {
+                'pending_count': pending,
+                'ideas_count': ideas,
+                'completed_count': completed,
+                'tasks_created': created,
+                'completion_rate': completion_rate,
+                'on_time_count': on_time,
+                'on_time_rate': on_time_rate,
+                'period_days': days
+            }
+            
     except Exception as e:
-        logger.error(f"❌ Error getting stats: {e}")
+        logger.error(f"❌ Error getting dashboard: {e}")
         return {
+            'pending_count': 0,
+            'ideas_count': 0,
             'completed_count': 0,
             'tasks_created': 0,
             'completion_rate': 0,
@@ -818,8 +1769,6 @@ def get_completion_stats(user_id: int, days: int = 30) -> Dict:
             'on_time_rate': 0,
             'period_days': days
         }
-    finally:
-        db.close()
 
 
 # ============================================
@@ -854,42 +1803,78 @@ def create_assessment(
         patterns: Detected patterns (dict)
     
     Returns:
-        Created Assessment object or None
+        Created Assessment object (fully loaded, as in create_reminder) or None
     """
-    db = SessionLocal()
     try:
-        assessment = Assessment(
-            user_id=user_id,
-            assessment_type=assessment_type,
-            period_start=period_start,
-            period_end=period_end,
-            assessment_text=assessment_text,
-            tasks_completed=tasks_completed,
-            tasks_planned=tasks_planned,
-            completion_rate=completion_rate,
-            score=score,
-            patterns=patterns or {}
-        )
-        
-        db.add(assessment)
-        db.commit()
-        db.refresh(assessment)
-        
-        logger.info(f"✅ {assessment_type} assessment created for user {user_id}")
-        return assessment
-        
+        with session_scope() as db:
+            assessment = Assessment(
+                user_id=user_id,
+                assessment_type=assessment_type,
+                period_start=period_start,
+                period_end=period_end,
+                assessment_text=assessment_text,
+                tasks_completed=tasks_completed,
+                tasks_planned=tasks_planned,
+                completion_rate=completion_rate,
+                score=score,
+                patterns=patterns or {}
+            )
+            
+            db.add(assessment)
+            db.commit()
+            _forget_cached_stats(user_id)
+            
+            logger.info(f"✅ {assessment_type} assessment created for user {user_id}")
+            return assessment
+            
     except Exception as e:
         logger.error(f"❌ Error creating assessment: {e}")
-        db.rollback()
         return None
-    finally:
-        db.close()
+
+
+def create_assessments_bulk(assessments: List[Dict]) -> List[int]:
+    """
+    Create many assessment records in one transaction.
+    
+    Args:
+        assessments: Dicts with the create_assessment() arguments
+            (patterns is optional)
+    
+    Returns:
+        IDs of the created assessments, in the same order (empty if failed)
+    """
+    if not assessments:
+        return []
+    
+    rows = [
+        {**assessment, "patterns": assessment.get("patterns") or {}}
+        for assessment in assessments
+    ]
+    
+    try:
+        with session_scope() as db:
+            ids = db.scalars(
+                insert(Assessment).returning(Assessment.id, sort_by_parameter_order=True),
+                rows
+            ).all()
+            db.commit()
+            for user_id in {row["user_id"] for row in rows}:
+                _forget_cached_stats(user_id)
+            
+            logger.info(f"✅ Created {len(ids)} assessments")
+            return ids
+            
+    except Exception as e:
+        logger.error(f"❌ Error creating assessments: {e}")
+        return []
 
 
 def get_latest_assessment(user_id: int, assessment_type: str) -> Optional[Assessment]:
     """
     Get the most recent assessment of a specific type.
     
+    Served from an in-memory cache when possible (see _forget_cached_stats).
+    
     Args:
         user_id: User's database ID
         assessment_type: daily, weekly, monthly, quarterly
@@ -897,19 +1882,24 @@ def get_latest_assessment(user_id: int, assessment_type: str) -> Optional[Assess
     Returns:
         Latest Assessment object or None
     """
-    db = SessionLocal()
+    with _stats_cache_lock:
+        cached = _assessment_cache.get(user_id, {})
+        if assessment_type in cached:
+            return cached[assessment_type]
+    
     try:
-        assessment = db.query(Assessment).filter(
-            and_(
-                Assessment.user_id == user_id,
-                Assessment.assessment_type == assessment_type
-            )
-        ).order_by(desc(Assessment.created_at)).first()
-        
+        with session_scope() as db:
+            assessment = db.scalars(
+                select(Assessment).where(
+                    Assessment.user_id == user_id,
+                    Assessment.assessment_type == assessment_type
+                ).order_by(desc(Assessment.created_at)).limit(1)
+            ).first()
+        
+        with _stats_cache_lock:
+            _assessment_cache.setdefault(user_id, {})[assessment_type] = assessment
         return assessment
-        
+            
     except Exception as e:
         logger.error(f"❌ Error getting assessment: {e}")
         return None
-    finally:
-        db.close()
@@ -13,20 +13,107 @@ Creates:
 By OkayYouGotMe
 """
 
+import asyncio
+import bisect
+import hashlib
 import logging
 from datetime import datetime, timedelta
+from string import Template
 from typing import Dict, List
 
+from cachetools import TTLCache
+
 from database.operations import (
-    get_user_by_id, get_completion_stats, get_pending_tasks,
+    get_user_by_id, get_completion_stats, get_user_dashboard,
     create_assessment, get_user_tasks
 )
 from database.models import User, MotivationStyle
-from config.settings import BRUTAL_HONESTY_LEVEL, SCORE_OUT_OF, COMPLETION_THRESHOLDS
+from config.settings import (
+    BRUTAL_HONESTY_LEVEL, SCORE_OUT_OF, COMPLETION_THRESHOLDS, MAX_CONCURRENT_ASSESSMENTS,
+    CLAUDE_CACHE_ENABLED, CLAUDE_CACHE_SIZE, CLAUDE_CACHE_TTL
+)
 from ai.claude_engine import claude
 
 logger = logging.getLogger(__name__)
 
+# Score for each COMPLETION_THRESHOLDS rating, as parallel lists sorted by
+# threshold so _calculate_score() can bisect them
+_RATING_SCORES = {'excellent': 9, 'good': 7, 'average': 6, 'below_average': 4, 'poor': 3}
+_THRESHOLDS, _SCORES = map(list, zip(*sorted(
+    (COMPLETION_THRESHOLDS[rating], score) for rating, score in _RATING_SCORES.items()
+)))
+
+# Claude responses by prompt hash (see _generate_with_claude).
+# Fallback texts are never stored, so a failed call is retried next time.
+_response_cache = TTLCache(maxsize=CLAUDE_CACHE_SIZE, ttl=CLAUDE_CACHE_TTL)
+
+
+# Assessment prompt. The settings-based parts are filled in once here;
+# _build_assessment_prompt() only substitutes the per-user fields.
+_ASSESSMENT_PROMPT = Template(Template("""Generate a $assessment_type productivity assessment for $name.
+
+USER PROFILE:
+- Profession: $profession
+- Goals: $goals
+- Motivation Style: $style
+
+STATISTICS:
+- Tasks Created: $tasks_created
+- Tasks Completed: $completed_count
+- Completion Rate: ${completion_rate}%
+- On-Time Rate: ${on_time_rate}%
+$pending_line
+
+BRUTAL HONESTY LEVEL: $honesty
+
+REQUIREMENTS:
+1. Be ${honesty}ly honest about their performance
+2. Point out specific patterns (procrastination, avoidance, etc.)
+3. Acknowledge wins but don't sugarcoat failures
+4. Provide actionable next steps
+5. Score them out of $score_out_of
+6. Match their motivation style ($style)
+
+FORMAT:
+═══════════════════════════════════════════════════
+$assessment_title DEBRIEF - $date
+═══════════════════════════════════════════════════
+
+COMPLETED: X/Y tasks (Z%)
+
+THE TRUTH:
+[Your honest assessment - no holding back]
+
+WHAT WORKED:
+[List specific wins]
+
+WHAT DIDN'T:
+[List specific failures/avoidances]
+
+PATTERNS DETECTED:
+[Behavior patterns you notice]
+
+TOMORROW'S PRIORITY / NEXT WEEK'S FOCUS:
+[Specific actionable steps]
+
+SCORE: X/$score_out_of
+[One sentence justification]
+
+═══════════════════════════════════════════════════
+
+Write the assessment now:
+""").safe_substitute(
+    honesty=BRUTAL_HONESTY_LEVEL,
+    score_out_of=SCORE_OUT_OF
+))
+
+
+# What the user sees when an assessment can't be generated
+_FAILED_MESSAGES = {
+    "daily": "Couldn't generate assessment today. Try again tomorrow!",
+    "weekly": "Couldn't generate weekly assessment."
+}
+
 
 class AssessmentGenerator:
     """
@@ -52,48 +139,7 @@ class AssessmentGenerator:
         Returns:
             Assessment text
         """
-        try:
-            # Get stats for today
-            stats = get_completion_stats(user.id, days=1)
-            pending = get_pending_tasks(user.id)
-            
-            # Build prompt for Claude
-            prompt = self._build_assessment_prompt(
-                user=user,
-                assessment_type="daily",
-                stats=stats,
-                pending_count=len(pending)
-            )
-            
-            # Generate assessment with Claude
-            assessment_text = await self._generate_with_claude(prompt, user)
-            
-            # Calculate score
-            score = self._calculate_score(stats['completion_rate'])
-            
-            # Save to database
-            today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-            today_end = datetime.utcnow()
-            
-            create_assessment(
-                user_id=user.id,
-                assessment_type="daily",
-                period_start=today_start,
-                period_end=today_end,
-                assessment_text=assessment_text,
-                tasks_completed=stats['completed_count'],
-                tasks_planned=stats['tasks_created'],
-                completion_rate=stats['completion_rate'],
-                score=score
-            )
-            
-            logger.info(f"📊 Daily assessment generated for {user.name}: {score}/10")
-            
-            return assessment_text
-        
-        except Exception as e:
-            logger.error(f"❌ Error generating daily assessment: {e}")
-            return "Couldn't generate assessment today. Try again tomorrow!"
+        return await self._generate(user, "daily", days=1)
     
     
     async def generate_weekly_assessment(self, user: User) -> str:
@@ -105,35 +151,58 @@ class AssessmentGenerator:
         Args:
             user: User object
         
+        Returns:
+            Assessment text
+        """
+        return await self._generate(user, "weekly", days=7)
+    
+    
+    async def _generate(self, user: User, assessment_type: str, days: int) -> str:
+        """
+        Generate, score and save one assessment.
+        
+        Args:
+            user: User object
+            assessment_type: daily or weekly
+            days: Length of the period in days
+        
         Returns:
             Assessment text
         """
         try:
-            # Get stats for the week
-            stats = get_completion_stats(user.id, days=7)
+            # One clock reading for the whole assessment, so the stats and
+            # the saved period agree
+            now = datetime.utcnow()
+            if assessment_type == "daily":
+                period_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            else:
+                period_start = now - timedelta(days=days)
+            
+            # Get stats and the pending count in one query
+            # (off the event loop - other users' assessments keep going)
+            stats = await asyncio.to_thread(get_user_dashboard, user.id, days)
             
-            # Build prompt
+            # Build prompt for Claude (pending tasks only matter for today)
             prompt = self._build_assessment_prompt(
                 user=user,
-                assessment_type="weekly",
-                stats=stats
+                assessment_type=assessment_type,
+                stats=stats,
+                pending_count=stats['pending_count'] if assessment_type == "daily" else 0
             )
             
-            # Generate with Claude
+            # Generate assessment with Claude
             assessment_text = await self._generate_with_claude(prompt, user)
             
             # Calculate score
             score = self._calculate_score(stats['completion_rate'])
             
             # Save to database
-            week_start = datetime.utcnow() - timedelta(days=7)
-            week_end = datetime.utcnow()
-            
-            create_assessment(
+            await asyncio.to_thread(
+                create_assessment,
                 user_id=user.id,
-                assessment_type="weekly",
-                period_start=week_start,
-                period_end=week_end,
+                assessment_type=assessment_type,
+                period_start=period_start,
+                period_end=now,
                 assessment_text=assessment_text,
                 tasks_completed=stats['completed_count'],
                 tasks_planned=stats['tasks_created'],
@@ -141,13 +210,35 @@ class AssessmentGenerator:
                 score=score
             )
             
-            logger.info(f"📊 Weekly assessment generated for {user.name}: {score}/10")
+            logger.info(f"📊 {assessment_type.capitalize()} assessment generated for {user.name}: {score}/10")
             
             return assessment_text
         
         except Exception as e:
-            logger.error(f"❌ Error generating weekly assessment: {e}")
-            return "Couldn't generate weekly assessment."
+            logger.error(f"❌ Error generating {assessment_type} assessment: {e}")
+            return _FAILED_MESSAGES[assessment_type]
+    
+    
+    async def generate_daily_assessments(self, users: List[User]) -> List[str]:
+        """
+        Generate daily assessments for many users at once (the nightly run).
+        
+        Assessments run concurrently, at most MAX_CONCURRENT_ASSESSMENTS
+        Claude calls at a time to stay inside API rate limits.
+        
+        Args:
+            users: User objects
+        
+        Returns:
+            Assessment texts, in the same order as users
+        """
+        limit = asyncio.Semaphore(MAX_CONCURRENT_ASSESSMENTS)
+        
+        async def generate(user: User) -> str:
+            async with limit:
+                return await self.generate_daily_assessment(user)
+        
+        return await asyncio.gather(*(generate(user) for user in users))
     
     
     def _build_assessment_prompt(
@@ -169,67 +260,30 @@ class AssessmentGenerator:
         Returns:
             Prompt string
         """
-        prompt = f"""Generate a {assessment_type} productivity assessment for {user.name}.
-
-USER PROFILE:
-- Profession: {user.profession or 'Not specified'}
-- Goals: {', '.join(user.goals) if user.goals else 'Not specified'}
-- Motivation Style: {user.motivation_style.value if user.motivation_style else 'direct'}
-
-STATISTICS:
-- Tasks Created: {stats['tasks_created']}
-- Tasks Completed: {stats['completed_count']}
-- Completion Rate: {stats['completion_rate']}%
-- On-Time Rate: {stats['on_time_rate']}%
-{f'- Pending Tasks: {pending_count}' if pending_count > 0 else ''}
-
-BRUTAL HONESTY LEVEL: {BRUTAL_HONESTY_LEVEL}
-
-REQUIREMENTS:
-1. Be {BRUTAL_HONESTY_LEVEL}ly honest about their performance
-2. Point out specific patterns (procrastination, avoidance, etc.)
-3. Acknowledge wins but don't sugarcoat failures
-4. Provide actionable next steps
-5. Score them out of {SCORE_OUT_OF}
-6. Match their motivation style ({user.motivation_style.value if user.motivation_style else 'direct'})
-
-FORMAT:
-═══════════════════════════════════════════════════
-{assessment_type.upper()} DEBRIEF - {datetime.utcnow().strftime('%B %d, %Y')}
-═══════════════════════════════════════════════════
-
-COMPLETED: X/Y tasks (Z%)
-
-THE TRUTH:
-[Your honest assessment - no holding back]
-
-WHAT WORKED:
-[List specific wins]
-
-WHAT DIDN'T:
-[List specific failures/avoidances]
-
-PATTERNS DETECTED:
-[Behavior patterns you notice]
-
-TOMORROW'S PRIORITY / NEXT WEEK'S FOCUS:
-[Specific actionable steps]
-
-SCORE: X/{SCORE_OUT_OF}
-[One sentence justification]
-
-═══════════════════════════════════════════════════
-
-Write the assessment now:
-"""
+        style = user.motivation_style or 'direct'
         
-        return prompt
+        return _ASSESSMENT_PROMPT.substitute(
+            assessment_type=assessment_type,
+            assessment_title=assessment_type.upper(),
+            date=datetime.utcnow().strftime('%B %d, %Y'),
+            name=user.name,
+            profession=user.profession or 'Not specified',
+            goals=', '.join(user.goals) if user.goals else 'Not specified',
+            style=style,
+            tasks_created=stats['tasks_created'],
+            completed_count=stats['completed_count'],
+            completion_rate=stats['completion_rate'],
+            on_time_rate=stats['on_time_rate'],
+            pending_line=f'- Pending Tasks: {pending_count}' if pending_count > 0 else ''
+        )
     
     
     async def _generate_with_claude(self, prompt: str, user: User) -> str:
         """
         Generate assessment using Claude.
         
+        Identical prompts within CLAUDE_CACHE_TTL reuse the earlier response.
+        
         Args:
             prompt: Assessment prompt
             user: User object
@@ -237,15 +291,18 @@ Write the assessment now:
         Returns:
             Generated assessment text
         """
+        key = hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+        if CLAUDE_CACHE_ENABLED:
+            cached = _response_cache.get(key)
+            if cached is not None:
+                logger.info(f"📊 Reusing cached assessment for user {user.id}")
+                return cached
+        
         try:
-            # Use Claude to generate
-            from anthropic import Anthropic
-            from config.settings import CLAUDE_API_KEY, CLAUDE_MODEL
-            
-            client = Anthropic(api_key=CLAUDE_API_KEY)
-            
-            response = client.messages.create(
-                model=CLAUDE_MODEL,
+            # Use Claude to generate - through the shared client, so the
+            # pooled connections stay warm between assessments
+            response = await claude.client.messages.create(
+                model=claude.model,
                 max_tokens=2000,
                 temperature=0.7,
                 messages=[{"role": "user", "content": prompt}]
@@ -253,11 +310,14 @@ Write the assessment now:
             
             assessment = response.content[0].text.strip()
             
+            if CLAUDE_CACHE_ENABLED:
+                _response_cache[key] = assessment
+            
             return assessment
         
         except Exception as e:
             logger.error(f"❌ Error generating with Claude: {e}")
-            return self._generate_fallback_assessment(user, "daily")
+            return await asyncio.to_thread(self._generate_fallback_assessment, user, "daily")
     
     
     def _calculate_score(self, completion_rate: int) -> int:
@@ -270,16 +330,9 @@ Write the assessment now:
         Returns:
             Score (0-10)
         """
-        if completion_rate >= COMPLETION_THRESHOLDS['excellent']:
-            return 9  # 9-10
-        elif completion_rate >= COMPLETION_THRESHOLDS['good']:
-            return 7  # 7-8
-        elif completion_rate >= COMPLETION_THRESHOLDS['average']:
-            return 6  # 6
-        elif completion_rate >= COMPLETION_THRESHOLDS['below_average']:
-            return 4  # 4-5
-        else:
-            return 3  # 3 or below
+        # Highest threshold the rate reaches; below them all counts as poor
+        index = bisect.bisect_right(_THRESHOLDS, completion_rate) - 1
+        return _SCORES[max(index, 0)]
     
     
     def _generate_fallback_assessment(
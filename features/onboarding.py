@@ -11,12 +11,14 @@ By OkayYouGotMe
 """
 
 import logging
-from typing import Optional, Dict
+import re
+from typing import Optional, Dict, List
 from datetime import datetime
 
 from database.models import User
 from database.operations import (
-    create_user, update_user_profile, complete_onboarding, get_user_by_id
+    create_user, update_user_profile, complete_onboarding,
+    update_user_profile_and_complete, get_user_by_id
 )
 from config.settings import (
     ONBOARDING_QUESTIONS, MOTIVATION_STYLES, CHALLENGES
@@ -27,6 +29,22 @@ from bot.messages import (
 
 logger = logging.getLogger(__name__)
 
+# Goals are listed one per line or comma-separated
+_GOAL_SEP = re.compile(r"[,\n]+")
+
+
+def _parse_goals(answer: str) -> List[str]:
+    """
+    Split a goals answer on commas and newlines, dropping blanks.
+    
+    Args:
+        answer: User's answer to the goals question
+    
+    Returns:
+        List of goals
+    """
+    return [goal for goal in (part.strip() for part in _GOAL_SEP.split(answer)) if goal]
+
 
 class OnboardingManager:
     """
@@ -44,6 +62,34 @@ class OnboardingManager:
     def __init__(self):
         """Initialize onboarding manager"""
         self.questions = ONBOARDING_QUESTIONS
+        
+        # Fixed acknowledgments, built once (see _get_acknowledgment)
+        self._acknowledgments = {
+            'profession': {
+                'nurse': "Healthcare hero! 🏥 Respect.",
+                'doctor': "Healthcare hero! 🏥 Respect.",
+                'teacher': "Shaping minds! 📚 Love it.",
+                'engineer': "Building the future! 🔧 Nice.",
+                'student': "Invest in yourself now, reap rewards later! 📖"
+            },
+            
+            'challenge': {
+                'a': "Staying focused - that's what I'm here for!",
+                'b': "Memory support - I've got you covered!",
+                'c': "Prioritization - we'll work on that together!",
+                'd': "Work-life balance - let's find it!"
+            },
+            
+            'motivation_style': {
+                'a': "Gentle nudges - I'll be patient with you.",
+                'b': "Brutally honest - I won't sugarcoat things. Deal?",
+                'c': "Celebrate wins - let's make every day a victory! 🎯",
+                'd': "Just the facts - I'll keep it concise."
+            },
+            
+            'schedule': "Got it - I'll respect your schedule."
+        }
+        
         logger.info("📋 Onboarding Manager initialized")
     
     
@@ -133,6 +179,15 @@ class OnboardingManager:
                     valid_options = ", ".join(question_data['options'])
                     return False, f"Please choose one of: {valid_options}", False
             
+            # Last question: save the answer and finish in one transaction
+            if step + 1 >= len(self.questions):
+                fields = self._answer_fields(user, question_id, answer)
+                if not update_user_profile_and_complete(user.id, **fields):
+                    return False, "Couldn't save that answer. Try again?", False
+                
+                user.onboarding_step = step + 1
+                return True, ONBOARDING_COMPLETE, True
+            
             # Store the answer
             success = self._store_answer(user, question_id, answer)
             
@@ -142,11 +197,6 @@ class OnboardingManager:
             # Move to next question
             user.onboarding_step = step + 1
             
-            # Check if onboarding is complete
-            if user.onboarding_step >= len(self.questions):
-                complete_onboarding(user.id)
-                return True, ONBOARDING_COMPLETE, True
-            
             # Get next question
             next_question = self.get_current_question(user)
             
@@ -176,39 +226,7 @@ class OnboardingManager:
             True if successful
         """
         try:
-            # Prepare update data
-            update_data = {}
-            
-            if question_id == 'name':
-                update_data['name'] = answer.strip()
-            
-            elif question_id == 'profession':
-                update_data['profession'] = answer.strip()
-            
-            elif question_id == 'challenge':
-                # Map letter to challenge
-                challenge = CHALLENGES.get(answer.lower(), 'unknown')
-                # Store in preferences
-                prefs = user.preferences or {}
-                prefs['main_challenge'] = challenge
-                update_data['preferences'] = prefs
-            
-            elif question_id == 'motivation_style':
-                # Map letter to style
-                style = MOTIVATION_STYLES.get(answer.lower(), 'direct')
-                update_data['motivation_style'] = style
-            
-            elif question_id == 'goals':
-                # Parse goals (split by comma or newline)
-                goals_list = []
-                for goal in answer.replace('\n', ',').split(','):
-                    goal = goal.strip()
-                    if goal:
-                        goals_list.append(goal)
-                update_data['goals'] = goals_list
-            
-            elif question_id == 'schedule':
-                update_data['work_schedule'] = answer.strip()
+            update_data = self._answer_fields(user, question_id, answer)
             
             # Update user profile
             return update_user_profile(user.id, **update_data)
@@ -218,6 +236,49 @@ class OnboardingManager:
             return False
     
     
+    def _answer_fields(self, user: User, question_id: str, answer: str) -> Dict:
+        """
+        Turn an onboarding answer into profile fields.
+        
+        Args:
+            user: User object
+            question_id: Which question (name, profession, etc.)
+            answer: User's answer
+        
+        Returns:
+            Keyword arguments for update_user_profile()
+        """
+        # Prepare update data
+        update_data = {}
+        
+        if question_id == 'name':
+            update_data['name'] = answer.strip()
+        
+        elif question_id == 'profession':
+            update_data['profession'] = answer.strip()
+        
+        elif question_id == 'challenge':
+            # Map letter to challenge
+            challenge = CHALLENGES.get(answer.lower(), 'unknown')
+            # Store in preferences
+            prefs = user.preferences or {}
+            prefs['main_challenge'] = challenge
+            update_data['preferences'] = prefs
+        
+        elif question_id == 'motivation_style':
+            # Map letter to style
+            style = MOTIVATION_STYLES.get(answer.lower(), 'direct')
+            update_data['motivation_style'] = style
+        
+        elif question_id == 'goals':
+            update_data['goals'] = _parse_goals(answer)
+        
+        elif question_id == 'schedule':
+            update_data['work_schedule'] = answer.strip()
+        
+        return update_data
+    
+    
     def _get_acknowledgment(self, question_id: str, answer: str) -> str:
         """
         Get a personalized acknowledgment for the answer.
@@ -231,56 +292,26 @@ class OnboardingManager:
         Returns:
             Acknowledgment message
         """
-        acknowledgments = {
-            'name': f"Nice to meet you, {answer.split()[0]}! 👋",
-            
-            'profession': {
-                'nurse': "Healthcare hero! 🏥 Respect.",
-                'doctor': "Healthcare hero! 🏥 Respect.",
-                'teacher': "Shaping minds! 📚 Love it.",
-                'engineer': "Building the future! 🔧 Nice.",
-                'student': "Invest in yourself now, reap rewards later! 📖",
-                'default': f"{answer} - got it!"
-            },
-            
-            'challenge': {
-                'a': "Staying focused - that's what I'm here for!",
-                'b': "Memory support - I've got you covered!",
-                'c': "Prioritization - we'll work on that together!",
-                'd': "Work-life balance - let's find it!"
-            },
-            
-            'motivation_style': {
-                'a': "Gentle nudges - I'll be patient with you.",
-                'b': "Brutally honest - I won't sugarcoat things. Deal?",
-                'c': "Celebrate wins - let's make every day a victory! 🎯",
-                'd': "Just the facts - I'll keep it concise."
-            },
-            
-            'goals': f"Love it! {len(answer.split(','))} solid goals to work toward.",
-            
-            'schedule': "Got it - I'll respect your schedule."
-        }
+        # These two are built from the answer itself
+        if question_id == 'name':
+            return f"Nice to meet you, {answer.split()[0]}! 👋"
         
-        # Get acknowledgment
-        ack = acknowledgments.get(question_id, "Got it!")
+        if question_id == 'goals':
+            return f"Love it! {len(_parse_goals(answer))} solid goals to work toward."
         
-        # Handle dict-based acknowledgments (like profession)
-        if isinstance(ack, dict):
-            # Check for keywords in answer
-            answer_lower = answer.lower()
-            for keyword, message in ack.items():
-                if keyword != 'default' and keyword in answer_lower:
-                    return message
-            return ack.get('default', "Got it!")
-        
-        # Handle choice-based acknowledgments
-        elif isinstance(ack, str) and '{' not in ack:
+        ack = self._acknowledgments.get(question_id, "Got it!")
+        if isinstance(ack, str):
             return ack
         
-        else:
-            # For motivation_style and challenge, answer is a letter
-            return acknowledgments[question_id].get(answer.lower(), "Got it!")
+        # Dict-based acknowledgments: check for keywords in answer
+        answer_lower = answer.lower()
+        for keyword, message in ack.items():
+            if keyword in answer_lower:
+                return message
+        
+        if question_id == 'profession':
+            return f"{answer} - got it!"
+        return "Got it!"
     
     
     def skip_onboarding(self, user: User) -> bool:
@@ -14,16 +14,19 @@ By OkayYouGotMe
 """
 
 import logging
-from datetime import datetime, timedelta
-from typing import List, Optional
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
 import asyncio
+import heapq
+import time
 
 from database.operations import (
-    create_reminder, get_pending_reminders, update_reminder_status,
-    get_user_by_id
+    create_reminder, claim_due_reminders, update_reminder_status, queue_reminder_status,
+    get_completion_stats, get_next_reminder_time
 )
 from database.models import Reminder, ReminderPriority
-from config.settings import REMINDER_INTERVALS
+from config.settings import REMINDER_NAG_OFFSETS, MAX_CONCURRENT_REMINDERS, REMINDER_MAX_SLEEP
 from bot.messages import (
     REMINDER_FIRST, REMINDER_SECOND, REMINDER_THIRD,
     REMINDER_FINAL, REMINDER_MARKED_MISSED
@@ -31,6 +34,20 @@ from bot.messages import (
 
 logger = logging.getLogger(__name__)
 
+# Nag messages by nag number: 2nd, 3rd, then the final one from there on
+_NAG_TEMPLATES = (REMINDER_SECOND, REMINDER_THIRD, REMINDER_FINAL)
+
+# The first and "missed" messages only fill in {task_name}: split them
+# around it once, so sending is a plain concatenation
+_FIRST_HEAD, _FIRST_TAIL = REMINDER_FIRST.split("{task_name}")
+_MISSED_HEAD, _MISSED_TAIL = REMINDER_MARKED_MISSED.split("{task_name}")
+
+# Replies to a reminder. Snooze takes an amount with an optional unit;
+# anything after it ("snooze 30 minutes", "snooze 2 hours") is ignored.
+_DONE_WORDS = frozenset({'done', 'completed', 'finished'})
+_CANCEL_WORDS = frozenset({'skip', 'cancel', 'nevermind'})
+_SNOOZE_RE = re.compile(r'snooze\s+(\d+)\s*([hm]?)', re.I)
+
 
 class ReminderManager:
     """
@@ -48,7 +65,22 @@ class ReminderManager:
             bot: Telegram bot instance (for sending messages)
         """
         self.bot = bot
-        self.active_reminders = {}  # Track active reminder loops
+        
+        # Reminders still being nagged:
+        # reminder_id -> (reminder, user, when each reminder/nag is due,
+        #                 reminder time) - times as epoch seconds
+        self.active_reminders: Dict[int, Tuple[Reminder, object, Tuple[float, ...], float]] = {}
+        
+        # Upcoming nags as (fire time, reminder_id, nag number), soonest
+        # first - one dispatcher task serves all of them
+        self._nag_heap: List[Tuple[float, int, int]] = []
+        self._wakeup = asyncio.Event()
+        self._dispatcher: Optional[asyncio.Task] = None
+        
+        # Reminders and nags share one limit on sends in flight, sized to
+        # the bot's Telegram connection pool (see MAX_CONCURRENT_REMINDERS)
+        self._send_slots = asyncio.Semaphore(MAX_CONCURRENT_REMINDERS)
+        
         logger.info("⏰ Reminder Manager initialized")
     
     
@@ -56,19 +88,30 @@ class ReminderManager:
         """
         Check for due reminders and send them.
         
-        Called by scheduler every minute.
+        Called by scheduler every minute. Due reminders are sent
+        concurrently, at most MAX_CONCURRENT_REMINDERS at a time.
         """
         try:
-            # Get all pending reminders that are due
-            due_reminders = get_pending_reminders()
+            # Take all pending reminders that are due (already marked sent)
+            due_reminders = await asyncio.to_thread(claim_due_reminders)
             
             if not due_reminders:
                 return
             
             logger.info(f"⏰ Found {len(due_reminders)} due reminders")
             
-            for reminder in due_reminders:
-                await self._process_reminder(reminder)
+            async def process(reminder: Reminder):
+                async with self._send_slots:
+                    await self._process_reminder(reminder)
+            
+            results = await asyncio.gather(
+                *(process(reminder) for reminder in due_reminders),
+                return_exceptions=True
+            )
+            
+            for reminder, result in zip(due_reminders, results):
+                if isinstance(result, Exception):
+                    logger.error(f"❌ Error sending reminder {reminder.id}: {result}")
         
         except Exception as e:
             logger.error(f"❌ Error checking reminders: {e}")
@@ -84,123 +127,162 @@ class ReminderManager:
             reminder: Reminder object
         """
         try:
-            user = get_user_by_id(reminder.user_id)
+            user = reminder.user  # Preloaded by claim_due_reminders()
             if not user:
                 logger.error(f"User {reminder.user_id} not found for reminder")
                 return
             
-            # Get priority intervals
-            priority = reminder.priority.value
-            intervals = REMINDER_INTERVALS.get(priority, [0])
+            # Get priority nag schedule (minutes after this first reminder)
+            priority = reminder.priority
+            offsets = REMINDER_NAG_OFFSETS.get(priority, (0,))
             
             # Send first reminder
-            message = REMINDER_FIRST.format(task_name=reminder.reminder_message)
+            message = _FIRST_HEAD + reminder.reminder_message + _FIRST_TAIL
             
             await self.bot.send_message(user.telegram_chat_id, message)
             
-            # Update reminder status
-            update_reminder_status(reminder.id, status="sent", nag_count=1)
-            
             logger.info(f"⏰ Sent reminder to {user.name}: {reminder.reminder_message}")
             
-            # Start nagging loop if priority requires it
-            if len(intervals) > 1:
-                asyncio.create_task(
-                    self._nag_loop(reminder, user, intervals)
-                )
+            # Start nagging if priority requires it
+            if len(offsets) > 1:
+                sent_at = time.time()
+                due_times = tuple(sent_at + minutes * 60 for minutes in offsets)
+                
+                # reminder_time is naive UTC
+                start_epoch = reminder.reminder_time.replace(tzinfo=timezone.utc).timestamp()
+                self.active_reminders[reminder.id] = (reminder, user, due_times, start_epoch)
+                self._schedule_nag(due_times[1], reminder.id, 2)
         
         except Exception as e:
             logger.error(f"❌ Error processing reminder: {e}")
     
     
-    async def _nag_loop(
-        self,
-        reminder: Reminder,
-        user,
-        intervals: List[int]
-    ):
+    def _schedule_nag(self, fire_at: float, reminder_id: int, idx: int):
         """
-        Persistent nagging loop.
-        
-        Keeps sending reminders at intervals until user responds.
+        Queue a nag for the dispatcher.
         
         Args:
-            reminder: Reminder object
-            user: User object
-            intervals: List of intervals in minutes [0, 5, 10, 15, 20]
+            fire_at: When to send it (epoch seconds)
+            reminder_id: Reminder's database ID
+            idx: Nag number (2 = first nag after the reminder)
         """
-        try:
-            # Skip first interval (already sent)
-            for idx, interval in enumerate(intervals[1:], start=2):
-                
-                # Wait for the interval
-                await asyncio.sleep(interval * 60)
-                
-                # Check if reminder was completed/cancelled
-                # (In real implementation, would query database)
-                # For now, we'll send all scheduled nags
-                
-                # Get user's completion rate for context
-                from database.operations import get_completion_stats
-                stats = get_completion_stats(user.id, days=7)
-                completion_rate = stats.get('completion_rate', 0)
-                
-                # Calculate elapsed time
-                start_time = reminder.reminder_time
-                elapsed_minutes = int((datetime.utcnow() - start_time).total_seconds() / 60)
+        heapq.heappush(self._nag_heap, (fire_at, reminder_id, idx))
+        self._wakeup.set()
+        
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._nag_dispatcher())
+    
+    
+    async def _nag_dispatcher(self):
+        """
+        Send queued nags when they're due.
+        
+        Sleeps until the soonest nag, or until a new one is queued.
+        """
+        while True:
+            try:
+                if self._nag_heap:
+                    delay = self._nag_heap[0][0] - time.time()
+                else:
+                    delay = None
                 
-                # Choose message based on nag count
-                if idx == 2:
-                    message = REMINDER_SECOND.format(
-                        task_name=reminder.reminder_message
-                    )
+                if delay is None or delay > 0:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._wakeup.clear()
+                    continue
                 
-                elif idx == 3:
-                    message = REMINDER_THIRD.format(
-                        task_name=reminder.reminder_message,
-                        elapsed_time=elapsed_minutes,
-                        priority=reminder.priority.value
-                    )
+                # Everything due now goes out together
+                due = []
+                now = time.time()
+                while self._nag_heap and self._nag_heap[0][0] <= now:
+                    _, reminder_id, idx = heapq.heappop(self._nag_heap)
+                    due.append(self._send_nag_limited(reminder_id, idx))
                 
-                elif idx >= 4:
-                    message = REMINDER_FINAL.format(
-                        task_name=reminder.reminder_message,
-                        elapsed_time=elapsed_minutes,
-                        completion_rate=completion_rate,
-                        priority=reminder.priority.value
-                    )
+                await asyncio.gather(*due)
+            
+            except Exception as e:
+                logger.error(f"❌ Error in nag dispatcher: {e}")
+    
+    
+    async def _send_nag_limited(self, reminder_id: int, idx: int):
+        """Send a nag once a send slot is free (see _send_slots)"""
+        async with self._send_slots:
+            await self._send_nag(reminder_id, idx)
+    
+    
+    async def _send_nag(self, reminder_id: int, idx: int):
+        """
+        Send one nag, then queue the next one.
+        
+        Keeps nagging at the priority's intervals until the user responds.
+        After the last nag, waits 5 more minutes and marks the reminder
+        as missed.
+        
+        Args:
+            reminder_id: Reminder's database ID
+            idx: Nag number (2 = first nag after the reminder)
+        """
+        try:
+            # Completed, cancelled or snoozed since this nag was queued -
+            # handle_reminder_response() drops it, which is all it takes
+            # to stop the rest of its nags
+            if reminder_id not in self.active_reminders:
+                return
+            
+            reminder, user, due_times, start_epoch = self.active_reminders[reminder_id]
+            
+            if idx > len(due_times):
+                # Send final "marked as missed" message
+                del self.active_reminders[reminder_id]
                 
-                else:
-                    # Generic nag
-                    message = f"⏰ REMINDER #{idx}: {reminder.reminder_message}\n\n"
-                    message += f"It's been {elapsed_minutes} minutes.\n"
-                    message += f"Reply 'done' when finished."
+                message = _MISSED_HEAD + reminder.reminder_message + _MISSED_TAIL
                 
-                # Send nag
                 await self.bot.send_message(user.telegram_chat_id, message)
                 
-                # Update nag count
-                update_reminder_status(reminder.id, status="sent", nag_count=idx)
+                # Mark as incomplete (written in the next batch)
+                queue_reminder_status(reminder.id, status="cancelled")
                 
-                logger.info(f"⏰ Nag #{idx} sent for reminder {reminder.id}")
+                logger.info(f"⏰ Reminder {reminder.id} marked as missed")
+                return
+            
+            # Queue what comes next: another nag, or the missed check
+            # 5 minutes after the last one
+            if idx < len(due_times):
+                self._schedule_nag(due_times[idx], reminder_id, idx + 1)
+            else:
+                self._schedule_nag(due_times[-1] + 5 * 60, reminder_id, idx + 1)
             
-            # After all nags, mark as missed if not completed
-            await asyncio.sleep(5 * 60)  # Wait 5 more minutes
+            # Calculate elapsed time
+            elapsed_minutes = int((time.time() - start_epoch) // 60)
             
-            # Send final "marked as missed" message
-            message = REMINDER_MARKED_MISSED.format(
-                task_name=reminder.reminder_message
-            )
+            # Choose message based on nag count
+            template = _NAG_TEMPLATES[min(idx - 2, len(_NAG_TEMPLATES) - 1)]
+            context = {
+                'task_name': reminder.reminder_message,
+                'elapsed_time': elapsed_minutes,
+                'priority': reminder.priority
+            }
             
+            # Only the final warning quotes the user's completion rate
+            if template is REMINDER_FINAL:
+                stats = await asyncio.to_thread(get_completion_stats, user.id, days=7)
+                context['completion_rate'] = stats.get('completion_rate', 0)
+            
+            message = template.format(**context)
+            
+            # Send nag
             await self.bot.send_message(user.telegram_chat_id, message)
             
-            # Mark as incomplete
-            update_reminder_status(reminder.id, status="cancelled")
+            # Update nag count (written in the next batch)
+            queue_reminder_status(reminder.id, status="sent", nag_count=idx)
             
-            logger.info(f"⏰ Reminder {reminder.id} marked as missed")
+            logger.info(f"⏰ Nag #{idx} sent for reminder {reminder.id}")
         
         except Exception as e:
-            logger.error(f"❌ Error in nag loop: {e}")
+            logger.error(f"❌ Error sending nag: {e}")
     
     
     async def handle_reminder_response(
@@ -221,38 +303,34 @@ class ReminderManager:
         try:
             response_lower = response.lower().strip()
             
-            if response_lower in ['done', 'completed', 'finished']:
+            if response_lower in _DONE_WORDS:
                 # Mark as completed
-                update_reminder_status(reminder_id, status="completed")
+                self.active_reminders.pop(reminder_id, None)
+                await asyncio.to_thread(update_reminder_status, reminder_id, status="completed")
                 return "✅ Great! Marked as complete."
             
             elif response_lower.startswith('snooze'):
-                # Extract snooze duration
-                # Examples: "snooze 15", "snooze 1h", "snooze 30"
-                parts = response_lower.split()
+                # Examples: "snooze 15", "snooze 1h", "snooze 30m"
+                match = _SNOOZE_RE.match(response_lower)
                 
-                if len(parts) >= 2:
-                    duration_str = parts[1]
+                if match:
+                    amount, unit = match.groups()
+                    minutes = int(amount) * 60 if unit == 'h' else int(amount)
                     
-                    # Parse duration
-                    if duration_str.endswith('h'):
-                        minutes = int(duration_str[:-1]) * 60
-                    elif duration_str.endswith('m'):
-                        minutes = int(duration_str[:-1])
-                    else:
-                        minutes = int(duration_str)
-                    
-                    # Update reminder (would reschedule in real implementation)
-                    update_reminder_status(reminder_id, status="snoozed")
+                    # Update reminder (would reschedule in real implementation).
+                    # No more nags meanwhile - it isn't "sent" anymore.
+                    self.active_reminders.pop(reminder_id, None)
+                    await asyncio.to_thread(update_reminder_status, reminder_id, status="snoozed")
                     
                     return f"⏰ Snoozed for {minutes} minutes. I'll remind you then."
                 
                 else:
                     return "How long? Try 'snooze 15' or 'snooze 1h'"
             
-            elif response_lower in ['skip', 'cancel', 'nevermind']:
+            elif response_lower in _CANCEL_WORDS:
                 # Cancel reminder
-                update_reminder_status(reminder_id, status="cancelled")
+                self.active_reminders.pop(reminder_id, None)
+                await asyncio.to_thread(update_reminder_status, reminder_id, status="cancelled")
                 return "Reminder cancelled."
             
             else:
@@ -267,7 +345,7 @@ class ReminderScheduler:
     """
     Background scheduler for reminders.
     
-    Runs continuously checking for due reminders.
+    Runs continuously, sleeping until the next reminder is due.
     """
     
     def __init__(self, bot):
@@ -280,9 +358,42 @@ class ReminderScheduler:
         self.bot = bot
         self.reminder_manager = ReminderManager(bot)
         self.is_running = False
+        self._new_reminder = asyncio.Event()  # Set by add_reminder()
         logger.info("📅 Reminder Scheduler initialized")
     
     
+    async def add_reminder(
+        self,
+        user_id: int,
+        reminder_time: datetime,
+        reminder_message: str,
+        priority: str = "normal",
+        task_id: int = None
+    ) -> Optional[Reminder]:
+        """
+        Create a reminder and wake the scheduler, so it's sent on time
+        even if it's due before the next planned check.
+        
+        Args:
+            user_id: User's database ID
+            reminder_time: When to send the reminder
+            reminder_message: What to remind about
+            priority: optional, normal, important or critical
+            task_id: Related task (optional)
+        
+        Returns:
+            Created Reminder object or None
+        """
+        reminder = await asyncio.to_thread(
+            create_reminder, user_id, reminder_time, reminder_message, priority, task_id
+        )
+        
+        if reminder:
+            self._new_reminder.set()
+        
+        return reminder
+    
+    
     async def start(self):
         """Start the reminder scheduler"""
         self.is_running = True
@@ -290,11 +401,23 @@ class ReminderScheduler:
         
         while self.is_running:
             try:
-                # Check for due reminders
+                # Send whatever is due
                 await self.reminder_manager.check_and_send_reminders()
                 
-                # Wait 1 minute before next check
-                await asyncio.sleep(60)
+                # Sleep until the next reminder is due (or a new one is added)
+                next_time = await asyncio.to_thread(get_next_reminder_time)
+                if next_time is not None:
+                    delay = (next_time - datetime.utcnow()).total_seconds()
+                    # At least a second, so a reminder that couldn't be claimed can't spin the loop
+                    timeout = min(max(delay, 1), REMINDER_MAX_SLEEP)
+                else:
+                    timeout = REMINDER_MAX_SLEEP
+                
+                try:
+                    await asyncio.wait_for(self._new_reminder.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+                self._new_reminder.clear()
             
             except Exception as e:
                 logger.error(f"❌ Error in reminder scheduler: {e}")
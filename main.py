@@ -18,30 +18,22 @@ import asyncio
 import sys
 from datetime import datetime
 
-# Configure logging FIRST
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('ai_assistant.log')
-    ]
-)
+# Configure logging FIRST - one set of handlers, on the root logger
+# (see utils/logger.py); every module's logger propagates to it
+from utils.logger import setup_logger
+setup_logger()
 
 logger = logging.getLogger(__name__)
 
-# Now import everything else
-from config.settings import (
-    TELEGRAM_BOT_TOKEN, CLAUDE_API_KEY, DATABASE_URL,
-    BRAND_NAME, BRAND_TAGLINE, validate_config
-)
-from database.operations import init_database
-from bot.telegram_bot import TelegramBot
+# Now import everything else. The database layer and the bot (SQLAlchemy,
+# anthropic, python-telegram-bot) are imported where they're first needed,
+# so a bad configuration fails fast without loading them.
+from config.settings import BRAND_NAME, BRAND_TAGLINE, validate_config
 
 
-def print_banner():
-    """Print startup banner"""
-    banner = f"""
+def banner() -> str:
+    """Startup banner text"""
+    return f"""
 ╔══════════════════════════════════════════════════════════════╗
 ║                                                              ║
 ║           {BRAND_NAME:^50s}           ║
@@ -57,80 +49,101 @@ def print_banner():
 Current Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
 ═══════════════════════════════════════════════════════════════
+
 """
-    print(banner)
 
 
-def check_configuration():
+def check_configuration() -> tuple[bool, str]:
     """
     Verify all configuration is correct.
     
     Returns:
-        True if valid, False otherwise
+        (True if valid, status text to show)
     """
+    status = "🔍 Validating configuration...\n"
     try:
-        print("🔍 Validating configuration...")
         validate_config()
-        print("✅ Configuration valid!\n")
-        return True
+        return True, status + "✅ Configuration valid!\n\n"
     except Exception as e:
-        print(f"❌ Configuration error: {e}\n")
-        print("Please check your .env file or environment variables!")
-        return False
+        return False, (
+            status + f"❌ Configuration error: {e}\n\n"
+            "Please check your .env file or environment variables!\n"
+        )
 
 
-def initialize_database():
+def initialize_database() -> tuple[bool, str]:
     """
     Initialize database and create tables.
     
     Returns:
-        True if successful
+        (True if successful, status text to show)
     """
+    status = "💾 Initializing database...\n"
     try:
-        print("💾 Initializing database...")
-        init_database()
-        print("✅ Database ready!\n")
-        return True
+        from database.operations import init_database
+        
+        if not init_database():
+            raise RuntimeError("could not create or upgrade the tables (see log)")
+        return True, status + "✅ Database ready!\n\n"
     except Exception as e:
-        print(f"❌ Database error: {e}\n")
-        print("Check your DATABASE_URL in .env file!")
-        return False
+        return False, (
+            status + f"❌ Database error: {e}\n\n"
+            "Check your DATABASE_URL in .env file!\n"
+        )
+
+
+def show(lines: list):
+    """Write collected startup output to the console in one go"""
+    sys.stdout.write("".join(lines))
+    sys.stdout.flush()
 
 
 async def main():
     """
     Main application entry point.
     
-    Starts all components and runs the bot.
+    Starts all components and runs the bot. Startup output is collected
+    and written once, when startup finishes (or fails).
     """
-    # Print banner
-    print_banner()
+    startup = [banner()]
     
     # Validate configuration
-    if not check_configuration():
+    ok, status = check_configuration()
+    startup.append(status)
+    if not ok:
+        show(startup)
         sys.exit(1)
     
     # Initialize database
-    if not initialize_database():
+    ok, status = initialize_database()
+    startup.append(status)
+    if not ok:
+        show(startup)
         sys.exit(1)
     
     # Create bot instance
-    print("🤖 Starting Telegram bot...")
+    startup.append("🤖 Starting Telegram bot...\n")
+    from bot.telegram_bot import TelegramBot
     bot = TelegramBot()
     
-    print("✅ Telegram bot ready!\n")
-    print("═══════════════════════════════════════════════════════════════")
-    print("🚀 AI TASK ASSISTANT IS NOW RUNNING!")
-    print("═══════════════════════════════════════════════════════════════\n")
-    print("📱 Users can now message your bot on Telegram!")
-    print("📊 Bot is listening for messages...")
-    print("\n💡 Press Ctrl+C to stop the bot\n")
+    startup.append(
+        "✅ Telegram bot ready!\n\n"
+        "═══════════════════════════════════════════════════════════════\n"
+        "🚀 AI TASK ASSISTANT IS NOW RUNNING!\n"
+        "═══════════════════════════════════════════════════════════════\n\n"
+        "📱 Users can now message your bot on Telegram!\n"
+        "📊 Bot is listening for messages...\n"
+        "\n💡 Press Ctrl+C to stop the bot\n\n"
+    )
+    show(startup)
     
     logger.info("✅ Application started successfully")
     
     try:
-        # Run bot (blocking)
-        bot.run()
+        # Run bot until stopped (Ctrl+C / SIGTERM)
+        await bot.start()
+        print("\n\n🛑 Shut down gracefully.")
+        logger.info("Application stopped")
     
     except KeyboardInterrupt:
         print("\n\n🛑 Shutting down gracefully...")
@@ -146,8 +159,15 @@ def run():
     """
     Simple runner function.
     
-    Handles async event loop creation.
+    Handles async event loop creation. Uses uvloop when it's installed
+    (not available on Windows); otherwise asyncio's default loop.
     """
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    
     try:
         # For Python 3.11+, just run directly
         if sys.version_info >= (3, 11):
@@ -7,39 +7,108 @@ Simple, clean logging setup.
 By OkayYouGotMe
 """
 
+import atexit
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
+
+import orjson
+
 from config.settings import LOG_LEVEL, LOG_FORMAT, SAVE_LOGS_TO_FILE, LOG_FILE_PATH
 
 
-def setup_logger(name: str) -> logging.Logger:
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: {"t": epoch seconds, "lvl", "n": logger name, "m": message}.
+    
+    Cheaper than LOG_FORMAT - no strftime for asctime, no format-string
+    parsing - and easy for log platforms to parse.
+    """
+    
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        if record.exc_info:
+            message += "\n" + self.formatException(record.exc_info)
+        
+        return orjson.dumps({
+            "t": round(record.created, 3),
+            "lvl": record.levelname,
+            "n": record.name,
+            "m": message
+        }).decode()
+
+
+def queue_handler(*handlers: logging.Handler) -> QueueHandler:
     """
-    Set up a logger with consistent formatting.
+    Put handlers behind a queue, so their writes happen off the caller's thread.
+    
+    Logging from the event loop then only enqueues the record; a background
+    QueueListener formats it and does the console/file I/O. The listener
+    is stopped at exit, which writes anything still queued.
     
     Args:
-        name: Logger name (usually __name__)
+        handlers: Handlers to feed (given LOG_FORMAT if they have no formatter)
+    
+    Returns:
+        QueueHandler to attach to a logger
+    """
+    for handler in handlers:
+        if handler.formatter is None:
+            handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    
+    # The real formatting happens in the listener's handlers
+    handler = QueueHandler(log_queue)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    return handler
+
+
+def setup_logger(name: str = None) -> logging.Logger:
+    """
+    Set up logging with consistent formatting.
+    
+    Handlers (console, plus the log file if SAVE_LOGS_TO_FILE) are only
+    attached to the root logger, once. Named loggers get none - their
+    records propagate to the root, so every line is written exactly once.
+    
+    Args:
+        name: Logger name (usually __name__), or None for the root logger
     
     Returns:
         Configured logger
     """
     logger = logging.getLogger(name)
+    if name:
+        return logger
+    
     logger.setLevel(LOG_LEVEL)
     
     # Avoid duplicate handlers
     if logger.handlers:
         return logger
     
-    # Console handler
+    # Console handler - readable in a terminal, JSON lines otherwise
+    # (e.g. collected by the hosting platform)
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(LOG_LEVEL)
-    console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
-    logger.addHandler(console_handler)
+    if sys.stdout.isatty():
+        console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    else:
+        console_handler.setFormatter(JsonFormatter())
+    handlers = [console_handler]
     
     # File handler (optional)
     if SAVE_LOGS_TO_FILE:
         file_handler = logging.FileHandler(LOG_FILE_PATH)
         file_handler.setLevel(LOG_LEVEL)
-        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
-        logger.addHandler(file_handler)
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+    
+    logger.addHandler(queue_handler(*handlers))
     
     return logger